@@ -0,0 +1,40 @@
+# Per-call overhead of the Python bindings for cheap LibRaw getters
+#
+# usage: python3 benchmarks/call_overhead.py [<rawfile>]
+#
+# Compares a bound LibRaw method, the prototyped C function called
+# directly, and the unprototyped lookup through the library handle that
+# LibRaw.__getattr__ falls back to for functions missing from the table.
+# The getters do next to no work in C, so the timings are the cost of
+# getting into and out of ctypes.
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import libraw
+from libraw import LibRaw
+
+def bench(proc, number=200000):
+    hdl = libraw._lib()
+    raw_width = libraw._api["get_raw_width"]
+    h = proc._proc
+    cases = [
+        ("LibRaw.get_raw_width()", lambda: proc.get_raw_width()),
+        ("prototyped C function", lambda: raw_width(h)),
+        ("unprototyped lookup", lambda: getattr(hdl, "libraw_get_raw_width")(h)),
+        ("imgdata.sizes.raw_width", lambda: proc.imgdata.sizes.raw_width),
+        ("LibRaw.get_cam_mul(0)", lambda: proc.get_cam_mul(0)),
+    ]
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        yield name, best / number
+
+if __name__ == "__main__":
+    with LibRaw() as proc:
+        if len(sys.argv) > 1:
+            proc.open_file(sys.argv[1])
+        print("{:26} {:>10}".format("call", "ns/call"))
+        for name, t in bench(proc):
+            print("{:26} {:>10.0f}".format(name, t * 1e9))
@@ -0,0 +1,137 @@
+# Speed and quality of the NumPy demosaic in libraw.demosaic against
+# LibRaw's dcraw_process at user_qual 0 to 3
+#
+# usage: python3 benchmarks/demosaic.py [<rawfile> ...]
+#
+# Without files a synthetic 12 bit IMX477 frame (see synthetic.py) is used
+# and the PSNR is measured against the scene it was sampled from. For raw
+# files the reference is LibRaw's AHD (user_qual 3). LibRaw develops to
+# linear 16 bit camera RGB without white balance, so both sides are
+# demosaic only; every channel is scaled to the reference mean before
+# comparing, which discounts LibRaw's level scaling, and a border of
+# BORDER pixels is left out. The NumPy engines run with one worker and one
+# per CPU; without LibRaw only their rows are printed.
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from libraw import LibRaw, cfa
+from libraw.bayer import BayerProcessor
+from libraw.demosaic import METHODS, demosaic
+import synthetic
+
+BORDER = 8
+
+QUALITIES = {0: "linear", 1: "VNG", 2: "PPG", 3: "AHD"}
+
+PARAMS = {
+    "output_bps": 16,
+    "output_color": 0,
+    "no_auto_bright": 1,
+    "use_camera_wb": 0,
+    "use_auto_wb": 0,
+}
+
+def _setup(proc, qual):
+    params = proc.imgdata.params
+    for name, value in PARAMS.items():
+        setattr(params, name, value)
+    params.gamm[0] = params.gamm[1] = 1.0
+    for i in range(4):
+        params.user_mul[i] = 1.0
+    params.user_qual = qual
+
+def above_black(mosaic, pattern, black, cblack=(0, 0, 0, 0)):
+    """
+    mosaic minus its black level, like the image LibRaw demosaics.
+    """
+    out = mosaic.astype(np.int32)
+    for color, plane in pattern.planes(out):
+        plane -= black + int(cblack[color])
+    return np.clip(out, 0, None).astype(np.uint16)
+
+def psnr(img, ref):
+    """
+    PSNR of img against ref after scaling every channel of img to the mean
+    of ref, with the peak of ref.
+    """
+    b = (slice(BORDER, -BORDER), slice(BORDER, -BORDER))
+    img = img[b].astype(np.float64)
+    ref = ref[b].astype(np.float64)
+    img *= ref.mean(axis=(0, 1)) / np.maximum(img.mean(axis=(0, 1)), 1e-12)
+    mse = np.mean((img - ref) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(ref.max() ** 2 / mse)
+
+def best(func, repeat):
+    t = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        t = min(t, time.perf_counter() - start)
+    return t, result
+
+def bench_numpy(mosaic, pattern, repeat):
+    out = {m: np.empty(mosaic.shape + (3,), np.float32) for m in METHODS}
+    workers = sorted({1, os.cpu_count() or 1})
+    for method in METHODS:
+        for n in workers:
+            t, img = best(lambda: demosaic(mosaic, pattern, method, out=out[method], workers=n), repeat)
+            yield "{} x{}".format(method, n), t, img
+
+def bench_libraw(open_unpacked, repeat):
+    """
+    open_unpacked(qual) returns an unpacked handle set up for user_qual qual.
+    """
+    for qual, name in QUALITIES.items():
+        proc = open_unpacked(qual)
+        t, img = best(lambda: (proc.dcraw_process(), proc.dcraw_make_mem_image())[1], repeat)
+        yield "LibRaw q{} {}".format(qual, name), t, img
+
+def synthetic_case(repeat):
+    width, height, bits, _ = synthetic.SENSORS["imx477"]
+    black, pattern = 256, "BGGR"
+    mosaic = synthetic.mosaic(width, height, bits, pattern, black)
+    truth = synthetic.scene(width, height).transpose(1, 2, 0)
+    bggr = cfa.Pattern([[2, 1], [1, 0]])
+    rows = list(bench_numpy(above_black(mosaic, bggr, black), bggr, repeat))
+    try:
+        with BayerProcessor(width, height, pattern, black, bits) as p:
+            def open_unpacked(qual):
+                _setup(p.proc, qual)
+                return p.open(mosaic)
+            rows += list(bench_libraw(open_unpacked, repeat))
+    except OSError as e:
+        print("LibRaw skipped: {}".format(e))
+    return [(name, t, img.shape, psnr(img, truth)) for name, t, img in rows]
+
+def file_case(path, repeat):
+    with LibRaw() as proc:
+        def open_unpacked(qual):
+            _setup(proc, qual)
+            proc.open_file(path)
+            proc.unpack()
+            return proc
+        rows = list(bench_libraw(open_unpacked, repeat))
+        ref = rows[-1][2]
+        open_unpacked(0)
+        pattern = cfa.from_imgdata(proc.imgdata)
+        color = proc.imgdata.color
+        mosaic = above_black(proc.imgdata.rawdata.visible_image, pattern, color.black, color.cblack[:4])
+        rows += list(bench_numpy(mosaic, pattern, repeat))
+    return [(name, t, img.shape, psnr(img, ref) if img.shape == ref.shape else float("nan"))
+            for name, t, img in rows]
+
+if __name__ == "__main__":
+    print("{:18} {:>12} {:>10} {:>9} {:>9}".format("method", "size", "ms/frame", "MP/s", "PSNR dB"))
+    cases = [(path, lambda path=path: file_case(path, 3)) for path in sys.argv[1:]] or \
+            [("synthetic imx477", lambda: synthetic_case(3))]
+    for label, case in cases:
+        print(label)
+        for name, t, shape, err in case():
+            print("{:18} {:>12} {:>10.1f} {:>9.1f} {:>9.1f}".format(
+                name, "{}x{}".format(shape[1], shape[0]), t * 1e3, shape[0] * shape[1] / t / 1e6, err))
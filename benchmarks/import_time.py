@@ -0,0 +1,44 @@
+# Import-time benchmark for libraw.py
+#
+# usage: python3 benchmarks/import_time.py [runs]
+#
+# Every measurement runs in a fresh interpreter so nothing is shared between
+# runs. "cold" starts with an empty library path cache, "warm" reuses it.
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+IMPORT_ONLY = "import libraw"
+FIRST_HANDLE = "import libraw; libraw.LibRaw()"
+
+def run(code, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True)
+    return time.perf_counter() - start
+
+def best(code, env, runs, clear=None):
+    times = []
+    for _ in range(runs):
+        if clear and os.path.exists(clear):
+            os.remove(clear)
+        times.append(run(code, env))
+    return min(times)
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    with tempfile.TemporaryDirectory() as cache:
+        env = dict(os.environ, XDG_CACHE_HOME=cache, PYTHONPATH=ROOT)
+        cache_file = os.path.join(cache, "libraw.py", "libpath")
+
+        baseline = best("pass", env, runs)
+        print("interpreter start      {:8.1f} ms".format(baseline * 1e3))
+        print("import libraw          {:8.1f} ms".format((best(IMPORT_ONLY, env, runs) - baseline) * 1e3))
+        print("first LibRaw(), cold   {:8.1f} ms".format((best(FIRST_HANDLE, env, runs, clear=cache_file) - baseline) * 1e3))
+        print("first LibRaw(), warm   {:8.1f} ms".format((best(FIRST_HANDLE, env, runs) - baseline) * 1e3))
@@ -0,0 +1,195 @@
+# Benchmark suite over synthetic raw files
+#
+# usage: python3 benchmarks/suite.py [-o results.json] [--size small|full]
+#                                    [--repeat N] [--preset NAME ...]
+#                                    [--compare old.json]
+#
+# Generates DNG and raspistill -r inputs with benchmarks/synthetic.py (kept
+# in --workdir between runs), then times open_file, unpack, raw2image,
+# dcraw_process and the output steps of every file with every parameter
+# preset. Each (file, preset) pair runs in its own interpreter so its peak
+# RSS can be reported. BRCM files are also decoded with libraw.brcm.
+#
+# The JSON written with -o records the commit and machine; --compare prints
+# the ratio of every stage against an earlier run, marking slowdowns of
+# more than 10%. Nothing needs the network or real camera files.
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+# name -> imgdata.params set before opening
+PRESETS = {
+    "half": {"half_size": 1, "user_qual": 0},
+    "linear": {"user_qual": 0},
+    "ahd": {"user_qual": 3},
+    "ahd16": {"user_qual": 3, "output_bps": 16},
+}
+
+def _peak_rss():
+    """
+    peak resident set size of this process in KiB.
+    """
+    # ru_maxrss survives exec on Linux and would include the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+def _clock(times, stage, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    times[stage] = min(times.get(stage, elapsed), elapsed)
+    return result
+
+def measure(path, preset, repeat):
+    """
+    the best time of every stage over repeat runs of path with preset.
+    """
+    from libraw import LibRaw, brcm
+
+    times = {}
+    if preset == "brcm.decode":
+        out = None
+        for _ in range(repeat):
+            raw = _clock(times, "brcm.decode", brcm.decode, path, out)
+            out = raw.raw_image
+        return times
+
+    with LibRaw() as proc, tempfile.TemporaryDirectory() as tmp:
+        for name, value in PRESETS[preset].items():
+            setattr(proc.imgdata.params, name, value)
+        output = os.path.join(tmp, "out.tiff" if proc.imgdata.params.output_bps == 16 else "out.ppm")
+        proc.imgdata.params.output_tiff = int(output.endswith(".tiff"))
+        for _ in range(repeat):
+            _clock(times, "open_file", proc.open_file, path)
+            _clock(times, "unpack", proc.unpack)
+            _clock(times, "raw2image", proc.raw2image)
+            proc.free_image()
+            _clock(times, "dcraw_process", proc.dcraw_process)
+            img = _clock(times, "make_mem_image", proc.dcraw_make_mem_image)
+            del img
+            _clock(times, "ppm_tiff_writer", proc.dcraw_ppm_tiff_writer, output)
+    return times
+
+def _case(path, preset, repeat):
+    """
+    run one case in a fresh interpreter and return its result dict.
+    """
+    cmd = [sys.executable, os.path.abspath(__file__), "--case", path, preset, str(repeat)]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else "exit status {}".format(proc.returncode)}
+    return json.loads(proc.stdout)
+
+def _meta():
+    meta = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+    try:
+        meta["commit"] = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL,
+                                                 universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        meta["commit"] = None
+    try:
+        import numpy
+        import libraw
+        meta["numpy"] = numpy.__version__
+        meta["libraw"] = libraw.version()
+    except Exception as e:
+        meta["libraw"] = None
+        meta["libraw_error"] = str(e)
+    return meta
+
+def run(size, presets, repeat, workdir, quiet=False):
+    import synthetic
+
+    results = []
+    for path, kind, width, height, bits in synthetic.generate(workdir, size):
+        names = list(presets) + (["brcm.decode"] if kind == "brcm" else [])
+        for preset in names:
+            row = {"input": os.path.basename(path), "kind": kind, "width": width, "height": height,
+                   "bits": bits, "preset": preset}
+            row.update(_case(path, preset, repeat))
+            results.append(row)
+            if not quiet:
+                print(_format(row), file=sys.stderr)
+    return {"meta": _meta(), "results": results}
+
+def _format(row):
+    if "error" in row:
+        return "{input:32} {preset:12} error: {error}".format(**row)
+    times = " ".join("{}={:.1f}ms".format(s, t * 1e3) for s, t in row["times"].items())
+    return "{:32} {:12} {}  peak {:.0f} MiB".format(row["input"], row["preset"], times, row["peak_rss_kb"] / 1024)
+
+def compare(new, old, threshold=1.1):
+    """
+    print new/old time ratios of the stages both runs have.
+    """
+    base = {(r["input"], r["preset"]): r for r in old["results"] if "times" in r}
+    print("{:32} {:12} {:16} {:>9} {:>9} {:>7}".format("input", "preset", "stage", "old ms", "new ms", "ratio"))
+    for r in new["results"]:
+        b = base.get((r["input"], r["preset"]))
+        if b is None or "times" not in r:
+            continue
+        for stage, t in r["times"].items():
+            if stage in b["times"]:
+                ratio = t / b["times"][stage]
+                print("{:32} {:12} {:16} {:>9.1f} {:>9.1f} {:>7.2f}{}".format(
+                    r["input"], r["preset"], stage, b["times"][stage] * 1e3, t * 1e3, ratio,
+                    " *" if ratio > threshold else ""))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="time LibRaw on synthetic raw files")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--size", choices=("small", "full"), default="small",
+                        help="small: 2 DNGs and 2 BRCM files, full: up to 12 MP and 16 bit")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, the best is kept")
+    parser.add_argument("--preset", action="append", choices=sorted(PRESETS), help="presets to run (default all)")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "libraw.py-bench"),
+                        help="where the synthetic files are kept")
+    parser.add_argument("--compare", metavar="OLD", help="compare against the JSON of an earlier run")
+    parser.add_argument("--case", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        path, preset, repeat = args.case
+        times = measure(path, preset, int(repeat))
+        json.dump({"times": times, "peak_rss_kb": _peak_rss()}, sys.stdout)
+        return 0
+
+    result = run(args.size, args.preset or list(PRESETS), args.repeat, args.workdir)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=1)
+    else:
+        json.dump(result, sys.stdout, indent=1)
+        print()
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
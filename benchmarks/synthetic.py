@@ -0,0 +1,238 @@
+# Synthetic raw files for the benchmarks
+#
+# usage: python3 benchmarks/synthetic.py <outdir> [small|full]
+#
+# Writes minimal uncompressed DNGs and raspistill -r style JPEGs with a BRCM
+# payload, so the benchmarks need no sample files. The scene is a smooth
+# gradient with colored patches, fine stripes and noise, made up in the
+# bayer domain; it is not meant to look like a photograph, only to give
+# demosaic and color conversion realistic work.
+
+import os
+import struct
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from libraw import brcm
+
+# pattern -> DNG CFAPattern (0 red, 1 green, 2 blue)
+CFA_PATTERNS = {
+    "RGGB": (0, 1, 1, 2),
+    "GBRG": (1, 2, 0, 1),
+    "BGGR": (2, 1, 1, 0),
+    "GRBG": (1, 0, 2, 1),
+}
+
+# the raspistill sensors: name -> (width, height, bits, bayer_order)
+SENSORS = {
+    "ov5647": (2592, 1944, 10, 2),
+    "imx219": (3280, 2464, 10, 2),
+    "imx477": (4056, 3040, 12, 2),
+}
+
+# name -> (width, height, bits) of the generated DNGs
+DNG_SIZES = {
+    "small": [(1024, 768, 12), (2048, 1536, 14)],
+    "full": [(1024, 768, 12), (2048, 1536, 14), (4056, 3040, 12), (4056, 3040, 16)],
+}
+
+# XYZ -> linear sRGB, so the DNG "camera" space is sRGB
+_COLOR_MATRIX = [[3.2406, -1.5372, -0.4986], [-0.9689, 1.8758, 0.0415], [0.0557, -0.2040, 1.0570]]
+_AS_SHOT_NEUTRAL = [0.5, 1.0, 0.7]
+
+def scene(width, height):
+    """
+    the (3, height, width) float32 RGB scene in [0, 1] that mosaic() samples.
+    """
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    x = np.linspace(0, 1, width, dtype=np.float32)[None, :]
+    scene = np.empty((3, height, width), np.float32)
+    scene[0] = 0.2 + 0.6 * x * (1 - 0.5 * y)
+    scene[1] = 0.15 + 0.7 * y * (1 - 0.3 * x)
+    scene[2] = 0.1 + 0.5 * (1 - x) * y
+    # patches and a band of fine stripes
+    for i, color in enumerate([(0.9, 0.1, 0.1), (0.1, 0.8, 0.1), (0.1, 0.2, 0.9), (0.95, 0.95, 0.95)]):
+        r0, c0 = height // 8, width // 8 + i * width // 5
+        scene[:, r0:r0 + height // 6, c0:c0 + width // 8] = np.array(color, np.float32)[:, None, None]
+    band = slice(height * 3 // 4, height * 3 // 4 + height // 10)
+    scene[:, band] *= 0.5 + 0.5 * (np.arange(width) // 3 % 2)
+    return scene
+
+def mosaic(width, height, bits, pattern="RGGB", black=0, seed=0):
+    """
+    a (height, width) uint16 bayer mosaic with values in [black, 2**bits - 1].
+    """
+    rng = np.random.default_rng(seed)
+    rgb = scene(width, height)
+    cfa = np.array(CFA_PATTERNS[pattern]).reshape(2, 2)
+    out = np.empty((height, width), np.float32)
+    for dy in range(2):
+        for dx in range(2):
+            out[dy::2, dx::2] = rgb[cfa[dy, dx], dy::2, dx::2]
+    white = (1 << bits) - 1
+    out *= white - black
+    out += black
+    out += rng.normal(0, 0.004 * white, out.shape).astype(np.float32)
+    return np.clip(out, 0, white).astype(np.uint16)
+
+def _tag(tag, type, values):
+    fmt = {1: "B", 2: "s", 3: "H", 4: "I", 5: "I", 10: "i"}[type]
+    if type == 2:
+        data = values.encode("ascii") + b"\0"
+        return tag, type, len(data), data
+    if type in (5, 10):
+        # rationals as numerator, denominator pairs over 10000
+        values = [int(round(v * 10000)) if i % 2 == 0 else 10000 for v in values for i in (0, 1)]
+        return tag, type, len(values) // 2, struct.pack("<{}{}".format(len(values), fmt), *values)
+    return tag, type, len(values), struct.pack("<{}{}".format(len(values), fmt), *values)
+
+def write_dng(path, raw, bits, pattern="RGGB", black=0, model="Synthetic"):
+    """
+    write raw, a (height, width) uint16 mosaic, as an uncompressed
+    single-IFD DNG with 16 bit samples.
+    """
+    height, width = raw.shape
+    data = raw.astype("<u2").tobytes()
+    tags = [
+        _tag(254, 4, [0]),                       # NewSubFileType: main image
+        _tag(256, 4, [width]),
+        _tag(257, 4, [height]),
+        _tag(258, 3, [16]),                      # BitsPerSample
+        _tag(259, 3, [1]),                       # Compression: none
+        _tag(262, 3, [32803]),                   # PhotometricInterpretation: CFA
+        _tag(271, 2, "libraw.py"),               # Make
+        _tag(272, 2, model),                     # Model
+        _tag(273, 4, [0]),                       # StripOffsets, patched below
+        _tag(274, 3, [1]),                       # Orientation
+        _tag(277, 3, [1]),                       # SamplesPerPixel
+        _tag(278, 4, [height]),                  # RowsPerStrip
+        _tag(279, 4, [len(data)]),               # StripByteCounts
+        _tag(284, 3, [1]),                       # PlanarConfiguration
+        _tag(33421, 3, [2, 2]),                  # CFARepeatPatternDim
+        _tag(33422, 1, list(CFA_PATTERNS[pattern])),
+        _tag(50706, 1, [1, 4, 0, 0]),            # DNGVersion
+        _tag(50708, 2, "libraw.py " + model),    # UniqueCameraModel
+        _tag(50710, 1, [0, 1, 2]),               # CFAPlaneColor
+        _tag(50711, 3, [1]),                     # CFALayout: rectangular
+        _tag(50714, 4, [black]),                 # BlackLevel
+        _tag(50717, 4, [(1 << bits) - 1]),       # WhiteLevel
+        _tag(50721, 10, [v for row in _COLOR_MATRIX for v in row]),
+        _tag(50728, 5, _AS_SHOT_NEUTRAL),
+        _tag(50778, 3, [21]),                    # CalibrationIlluminant1: D65
+    ]
+    ifd_size = 2 + 12 * len(tags) + 4
+    extra = 8 + ifd_size
+    entries, blobs = [], []
+    for tag, type, count, value in tags:
+        if len(value) <= 4:
+            entries.append(struct.pack("<HHI", tag, type, count) + value.ljust(4, b"\0"))
+        else:
+            entries.append(struct.pack("<HHII", tag, type, count, extra))
+            blobs.append(value + b"\0" * (len(value) % 2))
+            extra += len(blobs[-1])
+    strip = (extra + 15) // 16 * 16
+    index = [t[0] for t in tags].index(273)
+    entries[index] = struct.pack("<HHII", 273, 4, 1, strip)
+
+    with open(path, "wb") as f:
+        f.write(b"II*\0" + struct.pack("<I", 8))
+        f.write(struct.pack("<H", len(tags)) + b"".join(entries) + struct.pack("<I", 0))
+        f.write(b"".join(blobs))
+        f.write(b"\0" * (strip - extra))
+        f.write(data)
+
+def pack10(raw, stride):
+    """
+    pack (height, width) samples into MIPI RAW10 rows of stride bytes.
+    """
+    h, w = raw.shape
+    out = np.zeros((h, stride), np.uint8)
+    p = raw.reshape(h, w // 4, 4)
+    packed = out[:, :w * 5 // 4].reshape(h, w // 4, 5)
+    packed[..., :4] = p >> 2
+    packed[..., 4] = ((p & 3) << np.array([0, 2, 4, 6], np.uint16)).sum(axis=-1)
+    return out
+
+def pack12(raw, stride):
+    """
+    pack (height, width) samples into MIPI RAW12 rows of stride bytes.
+    """
+    h, w = raw.shape
+    out = np.zeros((h, stride), np.uint8)
+    p = raw.reshape(h, w // 2, 2)
+    packed = out[:, :w * 3 // 2].reshape(h, w // 2, 3)
+    packed[..., :2] = p >> 4
+    packed[..., 2] = (p[..., 0] & 0xF) | (p[..., 1] & 0xF) << 4
+    return out
+
+def _jpeg(sensor):
+    """
+    the smallest JPEG LibRaw accepts in front of the payload: SOI, an Exif
+    APP1 with the Make and Model raspistill writes, EOI. LibRaw picks its
+    BRCM loader by the model.
+    """
+    tags = [_tag(271, 2, "RaspberryPi"), _tag(272, 2, "RP_" + sensor)]
+    extra = 8 + 2 + 12 * len(tags) + 4
+    entries, blobs = [], b""
+    for tag, type, count, value in tags:
+        # both strings are longer than 4 bytes, so stored after the IFD
+        entries.append(struct.pack("<HHII", tag, type, count, extra + len(blobs)))
+        blobs += value + b"\0" * (len(value) % 2)
+    tiff = b"II*\0" + struct.pack("<IH", 8, len(tags)) + b"".join(entries) + struct.pack("<I", 0) + blobs
+    app1 = b"Exif\0\0" + tiff
+    return b"\xff\xd8\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1 + b"\xff\xd9"
+
+def write_brcm(path, sensor, seed=0):
+    """
+    write a raspistill -r JPEG of sensor (a key of SENSORS) and return its mosaic.
+    """
+    width, height, bits, order = SENSORS[sensor]
+    pattern = brcm.BAYER_ORDERS[order][0]
+    raw = mosaic(width, height, bits, pattern, brcm.BLACK_LEVELS[bits], seed)
+    stride = brcm._stride(width, bits)
+    size = next((s for s, (name, _) in brcm.PAYLOAD_SIZES.items() if name == sensor), None)
+    rows = (size - brcm.HEADER_SIZE) // stride if size else (height + 15) // 16 * 16
+
+    pixels = np.zeros((rows, stride), np.uint8)
+    pixels[:height] = (pack10 if bits == 10 else pack12)(raw, stride)
+    header = bytearray(brcm.HEADER_SIZE)
+    header[:4] = brcm.MAGIC
+    # format 33: bayer; bayer_format 3: RAW10, 4: RAW12 (LibRaw needs both)
+    brcm._INFO.pack_into(header, brcm._INFO_OFFSET, sensor.encode("ascii"), width, height,
+                         stride * 8 // bits - width, rows - height, 0, 0, 0, 0, 0, 0, 0, 33, order,
+                         3 if bits == 10 else 4)
+    with open(path, "wb") as f:
+        f.write(_jpeg(sensor))
+        f.write(header)
+        f.write(pixels.tobytes())
+    return raw
+
+def generate(outdir, size="small"):
+    """
+    write the synthetic inputs into outdir and return a list of
+    (path, kind, width, height, bits).
+    """
+    os.makedirs(outdir, exist_ok=True)
+    files = []
+    for width, height, bits in DNG_SIZES[size]:
+        path = os.path.join(outdir, "synthetic_{}x{}_{}bit.dng".format(width, height, bits))
+        if not os.path.exists(path):
+            write_dng(path, mosaic(width, height, bits), bits)
+        files.append((path, "dng", width, height, bits))
+    sensors = ["ov5647", "imx477"] if size == "small" else list(SENSORS)
+    for sensor in sensors:
+        width, height, bits, _ = SENSORS[sensor]
+        path = os.path.join(outdir, "synthetic_{}.jpg".format(sensor))
+        if not os.path.exists(path):
+            write_brcm(path, sensor)
+        files.append((path, "brcm", width, height, bits))
+    return files
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage {} <outdir> [small|full]".format(sys.argv[0]))
+        sys.exit(1)
+    for path, kind, width, height, bits in generate(sys.argv[1], *sys.argv[2:3]):
+        print("{} {}x{} {} bit".format(path, width, height, bits))
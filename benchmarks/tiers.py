@@ -0,0 +1,62 @@
+# Throughput and error of the render tiers in libraw.tiers
+#
+# usage: python3 benchmarks/tiers.py <rawfile> [<rawfile> ...]
+#
+# Every tier renders every file; the error is the PSNR against the "final"
+# render box-filtered down to the tier's size, both scaled to their maximum
+# to discount differences in brightness. The draft tiers use the
+# simplified color steps of libraw.pipeline, so part of their error is the
+# different color rendering rather than lost detail.
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from libraw import LibRaw
+from libraw.tiers import TIERS, render
+
+def downscale(img, shape):
+    """
+    box filter img to (height, width) of shape, cropping the remainder.
+    """
+    h, w = shape[:2]
+    fy, fx = img.shape[0] // h, img.shape[1] // w
+    img = img[:h * fy, :w * fx].astype(np.float64)
+    return img.reshape(h, fy, w, fx, -1).mean(axis=(1, 3))
+
+def psnr(a, b, peak):
+    mse = np.mean((a.astype(np.float64) - b) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(peak ** 2 / mse)
+
+def bench(path, repeat=3):
+    rows = []
+    with LibRaw() as proc:
+        proc.open_file(path)
+        final = render(proc, "final").astype(np.float64)
+        peak = 255.0
+        final = final / final.max() * peak
+        for name, tier in TIERS.items():
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                proc.open_file(path)
+                img = render(proc, name)
+                best = min(best, time.perf_counter() - start)
+            out = img.astype(np.float64) / max(img.max(), 1) * peak
+            rows.append((name, tier.scale, img.shape, best, psnr(out, downscale(final, img.shape), peak)))
+    return rows
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage {} <rawfile> [<rawfile> ...]".format(sys.argv[0]))
+        sys.exit(1)
+
+    print("{:10} {:>5} {:>12} {:>10} {:>9} {:>9}".format("tier", "scale", "size", "ms/frame", "frames/s", "PSNR dB"))
+    for path in sys.argv[1:]:
+        print(path)
+        for name, scale, shape, t, err in bench(path):
+            print("{:10} {:>5} {:>12} {:>10.1f} {:>9.2f} {:>9.1f}".format(
+                name, "1/{}".format(scale), "{}x{}".format(shape[1], shape[0]), t * 1e3, 1 / t, err))
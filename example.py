@@ -25,6 +25,8 @@ mosaic *= int(uint14_max/(saturation - black))
 mosaic = np.clip(mosaic,0,uint14_max)  # clip to range
 
 ## Listing 2: White Balancing
+# (assumes RGGB; libraw.cfa.from_imgdata(proc.imgdata).channel_by_name(mosaic, "R")
+#  gives the planes of a color for any bayer order)
 assert(proc.imgdata.idata.cdesc == b"RGBG")
 
 cam_mul = proc.imgdata.color.cam_mul # RGB multipliers
@@ -60,6 +62,13 @@ gcurve = np.array(gcurve, dtype=np.uint8)
 
 img = gcurve[img]  # apply gamma LUT
 
+## Listings 1-5 in a few passes with reusable buffers:
+# from libraw.pipeline import Pipeline
+# img = Pipeline.from_imgdata(proc.imgdata)(proc.imgdata.rawdata.visible_image)
+# This uses LibRaw's black level (color.black + cblack) instead of the
+# darkest raw value; to match the listings above pass
+# black=int(proc.imgdata.rawdata.raw_image.min()), cblack=None.
+
 ## show info and save output
 print("libraw version:", libraw.version())
 print("white balance multipliers", cam_mul[:-1])
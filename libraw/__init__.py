@@ -0,0 +1,1664 @@
+#!/usr/bin/python
+"""
+@package libraw
+Python Bindings for libraw
+
+use the documentation of libraw C API for function calls
+based on: https://gist.github.com/campaul/ee30b2dbc2c11a699bde
+
+@author: Pavel Rojtberg (http://www.rojtberg.net)
+@see: https://github.com/paroj/libraw.py
+@copyright: LGPLv2 (same as libraw) <http://opensource.org/licenses/LGPL-2.1>
+
+@change: Modified for use on Raspberry Pi by Dan Kimberling.
+@see: https://github.com/Dan-in-CA/LibRaw-forPi
+"""
+
+# standard library imports
+from ctypes import *
+from ctypes import _Pointer
+import collections
+import contextlib
+import ctypes.util
+import itertools
+from mmap import mmap as _mmap, ACCESS_READ
+import numpy as np
+import os
+import queue
+import site
+import subprocess
+import sys
+import threading
+import weakref
+
+so_file = "libraw.so.20.0.0"
+
+# environment variable that overrides the library search
+LIBRAW_ENV = "LIBRAW_LIBRARY"
+
+def _cache_file():
+    """
+    per-user file remembering where the *.so was found last time.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "libraw.py", "libpath")
+
+def _read_cache():
+    try:
+        with open(_cache_file()) as f:
+            path = f.read().strip()
+    except OSError:
+        return None
+    return path if os.path.isfile(path) else None
+
+def _write_cache(path):
+    try:
+        os.makedirs(os.path.dirname(_cache_file()), exist_ok=True)
+        with open(_cache_file(), "w") as f:
+            f.write(path)
+    except OSError:
+        pass  # a read-only home only costs us the next lookup
+
+def _soname(name):
+    """
+    the soname of a versioned library file name: libraw.so.20.0.0 -> libraw.so.20
+    """
+    base, sep, version = name.partition(".so.")
+    return base + sep + version.split(".")[0] if sep else name
+
+def _ldconfig(name):
+    """
+    look up name in the dynamic linker cache, which lists libraries by
+    soname; a line matches by its soname or by the file it points to.
+    """
+    for ldconfig in ("ldconfig", "/sbin/ldconfig"):
+        try:
+            out = subprocess.run([ldconfig, "-p"], stdout=subprocess.PIPE,
+                                 stderr=subprocess.DEVNULL, universal_newlines=True,
+                                 timeout=5).stdout
+            break
+        except (OSError, subprocess.SubprocessError):
+            continue
+    else:
+        return None
+    soname = _soname(name)
+    for line in out.splitlines():
+        if "=>" not in line:
+            continue
+        target = line.rsplit("=>", 1)[1].strip()
+        if line.split()[0] == soname or os.path.basename(target) == name:
+            return target
+    return None
+
+def _candidates(name):
+    """
+    yield possible locations of the *.so in the order they should be tried.
+    """
+    env = os.environ.get(LIBRAW_ENV)
+    if env:
+        yield env
+    # where setup.py data_files puts it
+    prefixes = [sys.prefix, sys.exec_prefix, "/usr/local"]
+    if site.ENABLE_USER_SITE:
+        prefixes.append(site.getuserbase())
+    for prefix in prefixes:
+        yield os.path.join(prefix, "lib", name)
+    # inside the package, then next to it in a source checkout
+    here = os.path.dirname(os.path.abspath(__file__))
+    yield os.path.join(here, name)
+    yield os.path.join(os.path.dirname(here), name)
+    # find_library returns whichever major version is installed; any other
+    # than ours has different structure layouts
+    found = ctypes.util.find_library("raw")
+    if found and os.path.basename(found) == _soname(name):
+        yield found
+    found = _ldconfig(name)
+    if found:
+        yield found
+
+def find(name=so_file):
+    """
+    locate the *.so (shared object) file to bind to.
+    Returns a path or library name that can be passed to LoadLibrary, or None.
+    """
+    for path in _candidates(name):
+        if os.path.isfile(path) or not os.path.dirname(path):
+            return path
+    return None
+
+_hdl = None
+_lib_lock = threading.Lock()
+
+def _lib():
+    """
+    load the shared library on first use.
+    The resolved path is cached per user so later processes skip the search.
+    """
+    global _hdl
+    if _hdl is not None:
+        return _hdl
+
+    with _lib_lock:
+        if _hdl is not None:
+            return _hdl
+
+        cached = None if os.environ.get(LIBRAW_ENV) else _read_cache()
+        for path in itertools.chain([cached] if cached else [], _candidates(so_file)):
+            if os.path.dirname(path) and not os.path.isfile(path):
+                continue
+            try:
+                hdl = cdll.LoadLibrary(path)
+            except OSError:
+                continue
+            if path != cached and os.path.isabs(path):
+                _write_cache(path)
+            _prototype(hdl)
+            _hdl = hdl
+            return _hdl
+
+        raise OSError("LibRaw file not found, set {} to the path of {}".format(LIBRAW_ENV, so_file))
+    
+# enum_LibRaw_thumbnail_formats = c_int
+time_t = c_long
+
+class libraw_decoder_info_t(Structure):
+    """Describes a raw format decoder name and format."""
+    _fields_ = [
+        ('decoder_name', c_char_p),
+        ('decoder_flags', c_uint),
+ 
+    ]
+
+class libraw_internal_output_params_t(Structure):
+    _fields_ = [
+        ('mix_green', c_uint),
+        ('raw_color', c_uint),
+        ('zero_is_bad', c_uint),
+        ('shrink', c_ushort),
+        ('fuji_width', c_ushort),
+    ]
+
+
+# enum LibRaw_image_formats
+LIBRAW_IMAGE_JPEG = 1
+LIBRAW_IMAGE_BITMAP = 2
+
+# bayer_pattern of open_bayer
+LIBRAW_OPENBAYER_RGGB = 0x94
+LIBRAW_OPENBAYER_BGGR = 0x16
+LIBRAW_OPENBAYER_GRBG = 0x61
+LIBRAW_OPENBAYER_GBRG = 0x49
+
+class libraw_processed_image_t(Structure):
+    """A container for processed image data."""
+    _fields_ = [
+        ('type', c_uint),  # LibRaw_image_formats
+        ('height', c_ushort),
+        ('width', c_ushort),
+        ('colors', c_ushort),
+        ('bits', c_ushort),
+        ('data_size', c_uint),
+        ('data', c_ubyte * 1),
+    ]
+ 
+    
+class libraw_iparams_t(Structure):
+    """The primary parameters of the image."""
+    _fields_ = [
+        ('guard', c_char * 4),
+        ('make', c_char * 64),
+        ('model', c_char * 64),
+        ('software', c_char * 64),
+        ('normalized_make', c_char * 64),
+        ("normalized_model", c_char * 64),
+        ("maker_index", c_uint),        
+        ('raw_count', c_uint),
+        ('dng_version', c_uint),
+        ('is_foveon', c_uint),
+        ('colors', c_int),
+        ('filters', c_uint),
+        ('xtrans', c_char * 6 * 6),
+        ('xtrans_abs', c_char * 6 * 6),
+        ('cdesc', c_char * 5),
+        ('xmplen', c_uint),
+        ('xmpdata', POINTER(c_char)),
+    ]
+ 
+    
+class libraw_raw_inset_crop_t(Structure):
+    """Describes the crop of an image."""
+    _fields_ = [
+        ('cleft', c_ushort),
+        ('ctop', c_ushort),
+        ('cwidth', c_ushort),
+        ('cheight', c_ushort),
+        ('aspect', c_ushort),
+    ]   
+
+
+class libraw_image_sizes_t(Structure):
+    """Describes the size of the image."""
+    _fields_ = [
+        ('raw_height', c_ushort),
+        ('raw_width', c_ushort),
+        ('height', c_ushort),
+        ('width', c_ushort),
+        ('top_margin', c_ushort),
+        ('left_margin', c_ushort),
+        ('iheight', c_ushort),
+        ('iwidth', c_ushort),
+        ('raw_pitch', c_uint),
+        ('pixel_aspect', c_double),
+        ('flip', c_int),
+        ('mask', c_int * 8 * 4),
+        ('raw_inset_crop', libraw_raw_inset_crop_t),
+    ]
+
+
+class ph1_t(Structure):
+    _fields_ = [
+        ('format', c_int),
+        ('key_off', c_int),
+        ('tag_21a', c_int),
+        ('t_black', c_int),
+        ('split_col', c_int),
+        ('black_col', c_int),
+        ('split_row', c_int),
+        ('black_row', c_int),
+        ('tag_210', c_float),
+    ]
+
+
+class libraw_dng_color_t(Structure):
+    _fields_ = [
+        ('parsedfields', c_uint),
+        ('illuminant', c_ushort),
+        ('_calibration', (c_float * 4) * 4),
+        ('_colormatrix', (c_float * 4) * 3),
+        ('_forwardmatrix', c_float * 3 * 4),
+    ]
+    
+    @property
+    def calibration(self):
+        return _cached_array(self, self._calibration, (4, 4), np.float32)   
+    
+    @property
+    def colormatrix(self):
+        return _cached_array(self, self._colormatrix, (4, 3), np.float32, transpose=True)
+   
+    @property
+    def forwardmatrix(self):
+        return _cached_array(self, self._forwardmatrix, (3, 4), np.float32)
+
+    
+class libraw_dng_levels_t(Structure):
+    _fields_ = [
+        ('parsedFields', c_uint),
+        ('dng_cblack', c_uint * 4102),
+        ('dng_black', c_uint),
+        ('dng_whitelevel', c_uint * 4),
+        ('default_crop', c_uint * 4),  # Origin and size
+        ('preview_colorspace', c_uint),
+        ('analogbalance', c_float * 4),
+    ]
+
+
+class libraw_P1_color_t(Structure):
+    _fields_ = [
+        ('romm_cam', c_float * 9),
+    ]
+ 
+ 
+class libraw_canon_makernotes_t(Structure):
+    _fields_ = [
+        ('ColorDataVer', c_int),
+        ('ColorDataSubVer', c_int),
+        ('SpecularWhiteLevel', c_int),
+        ('NormalWhiteLevel', c_int),
+        ('ChannelBlackLevel', c_int * 4),
+        ('AverageBlackLevel', c_int),
+        ('multishot', c_uint * 4),
+        ('MeteringMode', c_short),
+        ('SpotMeteringMode', c_short),
+        ('FlashMeteringMode', c_char),
+        ('FlashExposureLock', c_short),
+        ('ExposureMode', c_short),
+        ('AESetting', c_short),
+        ('HighlightTonePriority', c_char),
+        ('ImageStabilization', c_short),
+        ('FocusMode', c_short),
+        ('AFPoint', c_short),
+        ('FocusContinuous', c_short),
+        ('AFPointsInFocus30D', c_short),
+        ('AFPointsInFocus1D', c_char * 8),
+        ('AFPointsInFocus5D', c_ushort),
+        ('AFAreaMode', c_ushort),
+        ('NumAFPoints', c_ushort),
+        ('ValidAFPoints', c_ushort),
+        ('AFImageWidth', c_ushort),
+        ('AFImageHeight', c_ushort),
+        ('AFAreaWidths', c_short * 61),
+        ('AFAreaHeights', c_short * 61),
+        ('AFAreaXPositions', c_short * 61),
+        ('AFAreaYPositions', c_short * 61),
+        ('AFPointsInFocus', c_short * 4),
+        ('AFPointsSelected', c_short * 4),
+        ('PrimaryAFPoint', c_ushort),
+        ('FlashMode', c_short),
+        ('FlashActivity', c_short),
+        ('FlashBits', c_short),
+        ('ManualFlashOutput', c_short),
+        ('FlashOutput', c_short),
+        ('FlashGuideNumber', c_short),
+        ('ContinuousDrive', c_short),
+        ('SensorWidth', c_short),
+        ('SensorHeight', c_short),
+        ('SensorLeftBorder', c_short),
+        ('SensorTopBorder', c_short),
+        ('SensorRightBorder', c_short),
+        ('SensorBottomBorder', c_short),
+        ('BlackMaskLeftBorder', c_short),
+        ('BlackMaskTopBorder', c_short),
+        ('BlackMaskRightBorder', c_short),
+        ('BlackMaskBottomBorder', c_short),
+        ('AFMicroAdjMode', c_int),
+        ('AFMicroAdjValue', c_float),
+        ('MakernotesFlip', c_short),
+        ('RecordMode', c_short),
+        ('SRAWQuality', c_short),
+        ('wbi', c_uint),
+        ('firmware', c_float),
+        ('RF_lensID', c_short),
+    ]    
+
+
+class libraw_hasselblad_makernotes_t(Structure):
+    _fields_ = [
+        ('BaseISO', c_int),
+        ('Gain', c_double),
+        ('Sensor', c_char * 8),
+        ('SensorUnit', c_char * 64),
+        ('HostBody', c_char * 64),
+        ('SensorCode', c_int),
+        ('SensorSubCode', c_int),
+        ('CoatingCode', c_int),
+        ('uncropped', c_int),
+        ('CaptureSequenceInitiator', c_char * 32),
+        ('SensorUnitConnector', c_char * 64),
+        ('format', c_int),
+        ('nIFD_CM', c_int),
+        ('RecommendedCrop', c_int),
+        ('mnColorMatrix', c_double),
+    ]
+
+
+class libraw_fuji_info_t(Structure):
+    _fields_ = [
+        ('ExpoMidPointShift', c_float),
+        ('DynamicRange', c_ushort),
+        ('FilmMode', c_ushort),
+        ('DynamicRangeSetting', c_ushort),
+        ('DevelopmentDynamicRange', c_ushort),
+        ('AutoDynamicRange', c_ushort),
+        ('DRangePriority', c_ushort),
+        ('DRangePriorityAuto', c_ushort),
+        ('DRangePriorityFixed', c_ushort),
+        ('BrightnessCompensation', c_float),
+        ('FocusMode', c_ushort),
+        ('AFMode', c_ushort),
+        ('FocusPixel', c_ushort * 2),
+        ('ImageStabilization', c_ushort * 3),
+        ('FlashMode', c_ushort),
+        ('WB_Preset', c_ushort),
+        ('ShutterType', c_ushort),
+        ('ExrMode', c_ushort),
+        ('Macro', c_ushort),
+        ('Rating', c_uint),
+        ('CropMode', c_ushort),
+        ('FrameRate', c_ushort),
+        ('FrameWidth', c_ushort),
+        ('FrameHeight', c_ushort),
+        ('SerialSignature', c_char * (0x0c + 1)),
+        ('RAFVersion', c_char * (4 + 1)),
+        ('RAFDataVersion', c_ushort),
+        ('isTSNERDTS', c_uint),
+        ('DriveMode', c_ushort),
+    ]
+ 
+    
+class libraw_sensor_highspeed_crop_t(Structure):
+    _fields_ = [
+        ('cleft', c_ushort),
+        ('ctop', c_ushort),
+        ('cwidth', c_ushort),
+        ('cheight', c_ushort),
+    ]
+ 
+    
+class libraw_nikon_makernotes_t(Structure):
+    _fields_ = [
+        ('ExposureBracketValue', c_double),
+        ('ActiveDLighting', c_ushort),
+        ('ShootingMode', c_ushort),
+        ('ImageStabilization', c_ubyte * 7),
+        ('VibrationReduction', c_ubyte),
+        ('VRMode', c_ubyte),
+        ('FocusMode', c_char * 7),
+        ('AFPoint', c_ubyte),
+        ('AFPointsInFocus', c_ushort),
+        ('ContrastDetectAF', c_ubyte),
+        ('AFAreaMode', c_ubyte),
+        ('PhaseDetectAF', c_ubyte),
+        ('PrimaryAFPoint', c_ubyte),
+        ('AFPointsUsed', c_ubyte * 29),
+        ('AFImageWidth', c_ushort),
+        ('AFImageHeight', c_ushort),
+        ('AFAreaXPposition', c_ushort),
+        ('AFAreaYPosition', c_ushort),
+        ('AFAreaWidth', c_ushort),
+        ('AFAreaHeight', c_ushort),
+        ('ContrastDetectAFInFocus', c_ubyte),
+        ('FlashSetting', c_char * 13),
+        ('FlashType', c_char * 20),
+        ('FlashExposureCompensation', c_ubyte * 4),
+        ('ExternalFlashExposureComp', c_ubyte * 4),
+        ('FlashExposureBracketValue', c_ubyte * 4),
+        ('FlashMode', c_ubyte),
+        ('FlashExposureCompensation2', c_char),
+        ('FlashExposureCompensation3', c_char),
+        ('FlashExposureCompensation4', c_char),
+        ('FlashSource', c_ubyte),
+        ('FlashFirmware', c_ubyte * 2),
+        ('ExternalFlashFlags', c_ubyte),
+        ('FlashControlCommanderMode', c_ubyte),
+        ('FlashOutputAndCompensation', c_ubyte),
+        ('FlashFocalLength', c_ubyte),
+        ('FlashGNDistance', c_ubyte),
+        ('FlashGroupControlMode', c_ubyte * 4),
+        ('FlashGroupOutputAndCompensation', c_ubyte * 4),
+        ('FlashColorFilter', c_ubyte),
+        ('NEFCompression', c_ushort),
+        ('ExposureMode', c_int),
+        ('ExposureProgram', c_int),
+        ('nMEshots', c_int),
+        ('MEgainOn', c_int),
+        ('ME_WB', c_double * 4),
+        ('AFFineTune', c_ubyte),
+        ('AFFineTuneIndex', c_ubyte),
+        ('AFFineTuneAdj', c_int8),
+        ('LensDataVersion', c_uint),
+        ('FlashInfoVersion', c_uint),
+        ('ColorBalanceVersion', c_uint),
+        ('key', c_ubyte),
+        ('NEFBitDepth', c_ushort * 4),
+        ('HighSpeedCropFormat', c_ushort),
+        ('SensorHighSpeedCrop', libraw_sensor_highspeed_crop_t),
+        ('SensorWidth', c_ushort),
+        ('SensorHeight', c_ushort),
+    ]
+ 
+    
+class libraw_olympus_makernotes_t(Structure):
+    _fields_ = [
+        ('SensorCalibration', c_int * 2),
+        ('FocusMode', c_ushort * 2),
+        ('AutoFocus', c_ushort),
+        ('AFPoint', c_ushort),
+        ('AFAreas', c_uint * 64),
+        ('AFPointSelected', c_double * 5),
+        ('AFResult', c_ushort),
+        ('DriveMode', c_ushort * 5),
+        ('ColorSpace', c_ushort),
+        ('AffineTune', c_ubyte),
+        ('AffineTuneAdj', c_short * 3),
+        ("CameraType2", c_char * 6)
+    ]
+ 
+    
+class libraw_panasonic_makernotes_t(Structure):
+    _fields_ = [
+        # Compression:
+        # 34826 (Panasonic RAW 2): LEICA DIGILUX 2;
+        # 34828 (Panasonic RAW 3): LEICA D-LUX 3; LEICA V-LUX 1; Panasonic DMC-LX1; Panasonic DMC-LX2; Panasonic DMC-FZ30; Panasonic DMC-FZ50;
+        # 34830 (not in exiftool): LEICA DIGILUX 3; Panasonic DMC-L1;
+        # 34316 (Panasonic RAW 1): others (LEICA, Panasonic, YUNEEC);
+        ('Compression', c_ushort),
+        ('BlackLevelDim', c_ushort),
+        ('BlackLevel', c_float * 8),
+        ('Multishot', c_uint),
+        ('gamma', c_float),
+        ('HighISOMultiplier', c_int * 3),
+    ]
+
+    
+class libraw_pentax_makernotes_t(Structure):
+    _fields_ = [
+        ('FocusMode', c_ushort),
+        ('AFPointSelected', c_ushort),
+        ('AFPointsInFocus', c_uint),
+        ('FocusPosition', c_ushort),
+        ('DriveMode', c_ubyte * 4),
+        ('AFAdjustment', c_short),
+        ('MultiExposure', c_ubyte),
+        ('Quality', c_ushort),
+    ]
+
+
+class libraw_kodak_makernotes_t(Structure):
+    _fields_ = [
+        ('BlackLevelTop', c_ushort),
+        ('BlackLevelBottom', c_ushort),
+        ('offset_left', c_short),  # KDC files, negative values or zeros
+        ('offset_top', c_short),  # KDC files, negative values or zeros
+        ('clipBlack', c_ushort),  # valid for P712, P850, P880
+        ('clipWhite', c_ushort),  # valid for P712, P850, P880
+        ('romm_camDaylight', c_float * 3 * 3),
+        ('romm_camTungsten', c_float * 3 * 3),
+        ('romm_camFlourescent', c_float * 3 * 3),
+        ('romm_camFlash', c_float * 3 * 3),
+        ('romm_camCustom', c_float * 3 * 3),
+        ('romm_camAuto', c_float * 3 * 3),
+        ('val018percent', c_ushort),
+        ('val100percent', c_ushort),
+        ('val170percent', c_ushort),
+        ('MakerNoteKodak8a', c_short),
+        ('ISOCalibrationGain', c_float),
+        ('AnalogISO', c_float),
+    ]
+
+
+class libraw_p1_makernotes_t(Structure):
+    _fields_ = [
+        ('Software', c_byte * 64),
+        ('SystemType', c_byte * 64),
+        ('FirmwareString', c_byte * 256),
+        ('SystemModel', c_byte * 64),
+    ] 
+
+
+class libraw_sony_info_t(Structure):
+    _fields_ = [
+        ('CameraType', c_ushort),
+        ('Sony0x9400_version', c_ubyte), # 0 if not found/deciphered, 0xa, 0xb, 0xc following exiftool convention
+        ('Sony0x9400_ReleaseMode2', c_ubyte),
+        ('Sony0x9400_SequenceImageNumber', c_uint),
+        ('Sony0x9400_SequenceLength1', c_ubyte),
+        ('Sony0x9400_SequenceFileNumber', c_uint),
+        ('Sony0x9400_SequenceLength2', c_ubyte),
+        ('AFAreaModeSetting', c_ubyte),
+        ('FlexibleSpotPosition', c_ushort),
+        ('AFPointSelected', c_ubyte),
+        ('AFPointsUsed', c_ubyte),
+        ('AFTracking', c_ubyte),
+        ('AFType', c_ubyte),
+        ('FocusLocation', c_ushort),
+        ('AFMicroAdjValue', c_int8),
+        ('AFMicroAdjOn', c_int8),
+        ('AFMicroAdjRegisteredLenses;', c_ubyte),
+        ('VariableLowPassFilter', c_ushort),
+        ('LongExposureNoiseReduction', c_uint),
+        ('HighISONoiseReduction', c_ushort),
+        ('HDR', c_ushort * 2),
+        ('group2010', c_ushort),
+        ('real_iso_offset', c_ushort),
+        ('MeteringMode_offset', c_ushort),
+        ('ExposureProgram_offset', c_ushort),
+        ('ReleaseMode2_offset', c_ushort),
+        ('MinoltaCamID', c_uint),
+        ('firmware', c_float),
+        ('ImageCount3_offset', c_ushort),
+        ('ImageCount3', c_uint),
+        ('ElectronicFrontCurtainShutter', c_uint),
+        ('MeteringMode2', c_ushort),
+        ('SonyDateTime', c_char * 20),
+        ('ShotNumberSincePowerUp', c_uint),
+        ('PixelShiftGroupPrefix', c_ushort),
+        ('PixelShiftGroupID', c_uint),
+        ('nShotsInPixelShiftGroup', c_char),
+        ('numInPixelShiftGroup', c_char),
+        ('prd_ImageHeight', c_ushort),
+        ('prd_ImageWidth', c_ushort),
+        ('prd_RawBitDepth', c_ushort),
+        ('prd_StorageMethod', c_ushort),
+        ('prd_BayerPattern', c_ushort),
+        ('SonyRawFileType', c_ushort),
+        ('RAWFileType', c_ushort),
+        ('Quality', c_uint),
+        ('FileFormat' , c_ushort),
+    ]
+
+
+class libraw_colordata_t(Structure):
+    _fields_ = [
+        ('_curve', c_ushort * 0x10000),
+        ('_cblack', c_uint * 4102),
+        ('black', c_uint),
+        ('data_maximum', c_uint),
+        ('maximum', c_uint),
+        ('linear_max', c_long * 4),
+        ('fmaximum', c_float),
+        ('fnorm', c_float),
+        ('white', c_ushort * 8 * 8),
+        ('_cam_mul', c_float * 4),
+        ('_pre_mul', c_float * 4),
+        ('_cmatrix', (c_float * 4) * 3),
+        ('ccm', c_float * 3 * 4),
+        ('_rgb_cam', (c_float * 4) * 3),
+        ('_cam_xyz', (c_float * 3) * 4),
+        ('phase_one_data', ph1_t),
+        ('flash_used', c_float),
+        ('canon_ev', c_float),
+        ('model2', c_char * 64),
+        ('UniqueCameraModel', c_char * 64),
+        ('LocalizedCameraModel', c_char * 64),
+        ('ImageUniqueID', c_char * 64),
+        ('RawDataUniqueID', c_char * 17),
+        ('OriginalRawFileName', c_char * 64),      
+        ('profile', c_void_p),
+        ('profile_length', c_uint),
+        ('black_stat', c_uint * 8),
+        ('dng_color', libraw_dng_color_t * 2),
+        ('dng_levels', libraw_dng_levels_t),
+        ('WB_Coeffs', c_int * 256 * 4),
+        ('WBCT_Coeffs', c_float * 64 * 5),
+        ('as_shot_wb_applied', c_int),
+        ('P1_color', libraw_P1_color_t * 2),
+        ('raw_bps', c_uint),
+        ('ExifColorSpace', c_int),
+    ]
+
+    @property
+    def curve(self):
+        return _cached_array(self, self._curve, (0x10000,), np.uint16)
+    
+    @property
+    def cblack(self):
+        return _cached_array(self, self._cblack, (4102,), np.uint32)
+    
+    @property
+    def cam_mul(self):
+        return _cached_array(self, self._cam_mul, (4,), np.float32)
+
+    @property
+    def pre_mul(self):
+        return _cached_array(self, self._pre_mul, (4,), np.float32)
+
+    @property
+    def cmatrix(self):
+        return _cached_array(self, self._cmatrix, (3, 4), np.float32)
+
+    @property
+    def rgb_cam(self):
+        return _cached_array(self, self._rgb_cam, (3, 4), np.float32)
+    
+    @property
+    def cam_xyz(self):
+        return _cached_array(self, self._cam_xyz, (3, 4), np.float32)
+
+
+# enum LibRaw_thumbnail_formats
+LIBRAW_THUMBNAIL_UNKNOWN = 0
+LIBRAW_THUMBNAIL_JPEG = 1
+LIBRAW_THUMBNAIL_BITMAP = 2
+LIBRAW_THUMBNAIL_BITMAP16 = 3
+LIBRAW_THUMBNAIL_LAYER = 4
+LIBRAW_THUMBNAIL_ROLLEI = 5
+
+class libraw_thumbnail_t(Structure):
+    _fields_ = [
+        ('tformat', c_uint),  # LibRaw_thumbnail_formats
+        ('twidth', c_ushort),
+        ('theight', c_ushort),
+        ('tlength', c_uint),
+        ('tcolors', c_int),
+        ('_thumb', POINTER(c_char)),
+    ]
+
+    @property
+    def thumb(self):
+        """
+        the thumbnail bytes after unpack_thumb as a memoryview, without copying.
+        Only valid until the handle is recycled or closed.
+        """
+        if not self._thumb:
+            return None
+        return _buffer_from_memory(self._thumb, self.tlength)
+
+    @property
+    def bitmap(self):
+        """
+        a BITMAP/BITMAP16 thumbnail as a (theight, twidth, tcolors) array view, else None.
+        """
+        if not self._thumb or self.tformat not in (LIBRAW_THUMBNAIL_BITMAP, LIBRAW_THUMBNAIL_BITMAP16):
+            return None
+        dtype = np.uint8 if self.tformat == LIBRAW_THUMBNAIL_BITMAP else np.uint16
+        return _cached_array(self, self._thumb, (self.theight, self.twidth, self.tcolors), dtype)
+
+
+class libraw_gps_info_t(Structure):
+    _fields_ = [
+        ('latitude', c_float * 3),
+        ('longtitude', c_float * 3),
+        ('gpstimestamp', c_float * 3),
+        ('altitude', c_float),
+        ('altref', c_char),
+        ('latref', c_char),
+        ('longref', c_char),
+        ('gpsstatus', c_char),
+        ('gpsparsed', c_char),
+    ]
+ 
+    
+class libraw_imgother_t(Structure):
+    _fields_ = [
+        ('iso_speed', c_float),
+        ('shutter', c_float),
+        ('aperture', c_float),
+        ('focal_len', c_float),
+        ('timestamp', time_t),
+        ('shot_order', c_uint),
+        ('gpsdata', c_uint * 32),
+        ('parsed_gps', libraw_gps_info_t),
+        ('desc', c_char * 512),
+        ('artist', c_char * 64),
+        ('analogbalance', c_float * 4),
+    ]
+
+
+class libraw_metadata_common_t(Structure):
+    _fields_ = [  
+        ('FlashEC', c_float),
+        ('FlashGN', c_float),
+        ('CameraTemperature', c_float),
+        ('SensorTemperature', c_float),
+        ('SensorTemperature2', c_float),
+        ('LensTemperature', c_float),
+        ('AmbientTemperature', c_float),
+        ('BatteryTemperature', c_float),
+        ('exifAmbientTemperature', c_float),
+        ('exifHumidity', c_float),
+        ('exifPressure', c_float),
+        ('exifWaterDepth', c_float),
+        ('exifAcceleration', c_float),
+        ('exifCameraElevationAngle', c_float),
+        ('real_ISO', c_float),
+        ('exifExposureIndex', c_float),
+        ('ColorSpace', c_ushort),
+        ('firmware', c_char),
+    ]
+ 
+    
+class libraw_output_params_t(Structure):
+    """Output parameters for processing the image with dcraw."""
+    _fields_ = [                      #  Related dcraw switches:
+        ('greybox', c_uint * 4),      # -A  x1 y1 x2 y2
+        ('cropbox', c_uint * 4),      # -B x1 y1 x2 y2
+        ('aber', c_double * 4),       # -C
+        ('gamm', c_double * 6),       # -g
+        ('user_mul', c_float * 4),    # -r mul0 mul1 mul2 mul3
+        ('shot_select', c_uint),      # -s
+        ('bright', c_float),          # -b
+        ('threshold', c_float),       # -n
+        ('half_size', c_int),         # -h
+        ('four_color_rgb', c_int),    # -f
+        ('highlight', c_int),         # -H
+        ('use_auto_wb', c_int),       # -a
+        ('use_camera_wb', c_int),     # -w
+        ('use_camera_matrix', c_int), # +M/-M
+        ('output_color', c_int),      # -o
+        ('output_profile', c_char_p), # -o
+        ('camera_profile', c_char_p), # -p
+        ('bad_pixels', c_char_p),     # -P
+        ('dark_frame', c_char_p),     # -K
+        ('output_bps', c_int),        # -4
+        ('output_tiff', c_int),       # -T
+        ('user_flip', c_int),         # -t
+        ('user_qual', c_int),         # -q
+        ('user_black', c_int),        # -k
+        ('user_cblack', c_int * 4),
+        ('user_sat', c_int),          # -S
+        ('med_passes', c_int),        # -m
+        ('auto_bright_thr', c_float),
+        ('adjust_maximum_thr', c_float),
+        ('no_auto_bright', c_int),    # -W
+        ('use_fuji_rotate', c_int),   # -j
+        ('green_matching', c_int),
+        # DCB parameters
+        ('dcb_iterations', c_int),
+        ('dcb_enhance_fl', c_int),
+        ('fbdd_noiserd', c_int),
+        ('exp_correc', c_int),
+        ('exp_shift', c_float),
+        ('exp_preser', c_float),
+        # Raw speed
+        ('use_rawspeed', c_int),
+        # DNG SDK
+        ('use_dngsdk', c_int),
+        # Disable Auto-scale
+        ('no_auto_scale', c_int),
+        # Disable intepolation
+        ('no_interpolation', c_int),
+        ('raw_processing_options', c_uint),
+        ('max_raw_memory_mb', c_uint),
+        ('sony_arw2_posterization_thr', c_int),
+        # Nikon Coolscan
+        ('coolscan_nef_gamma', c_float),
+        ('p4shot_order', c_char * 5),
+        # Custom camera list
+        ('custom_camera_strings', POINTER(c_char_p)),
+    ]
+
+
+class libraw_makernotes_lens_t(Structure):
+    _fields_ = [
+        ('LensID', c_ulonglong),
+        ('Lens', c_char * 128),
+        ('LensFormat', c_ushort),
+        ('LensMount', c_ushort),
+        ('CamID', c_ulonglong),
+        ('CameraFormat', c_ushort),
+        ('CameraMount', c_ushort),
+        ('body', c_char * 64),
+        ('FocalType', c_short),
+        ('LensFeatures_pre', c_char * 16),
+        ('LensFeatures_suf', c_char * 16),
+        ('MinFocal', c_float),
+        ('MaxFocal', c_float),
+        ('MaxAp4MinFocal', c_float),
+        ('MaxAp4MaxFocal', c_float),
+        ('MinAp4MinFocal', c_float),
+        ('MinAp4MaxFocal', c_float),
+        ('MaxAp', c_float),
+        ('MinAp', c_float),
+        ('CurFocal', c_float),
+        ('CurAp', c_float),
+        ('MaxAp4CurFocal', c_float),
+        ('MinAp4CurFocal', c_float),
+        ('LensFStops', c_float),
+        ('TeleconverterID', c_ulonglong),
+        ('Teleconverter', c_char * 128),
+        ('AdapterID', c_ulonglong),
+        ('Adapter', c_char * 128),
+        ('AttachmentID', c_ulonglong),
+        ('Attachment', c_char * 128),
+        ('CanonFocalUnits', c_short),
+        ('FocalLengthIn35mmFormat', c_float),
+    ]
+
+
+class libraw_nikonlens_t(Structure):
+    _fields_ = [
+        ('NikonEffectiveMaxAp', c_float),
+        ('NikonLensIDNumber', c_ubyte),
+        ('NikonLensFStops', c_ubyte),
+        ('NikonMCUVersion', c_ubyte),
+        ('NikonLensType', c_ubyte),
+    ]
+
+
+class libraw_dnglens_t(Structure):
+    _fields_ = [
+        ('MinFocal', c_float),
+        ('MaxFocal', c_float),
+        ('MaxAp4MinFocal', c_float),
+        ('MaxAp4MaxFocal', c_float),
+    ]
+
+
+class libraw_lensinfo_t(Structure):
+    _fields_ = [
+        ('MinFocal', c_float),
+        ('MaxFocal', c_float),
+        ('MaxAp4MinFocal', c_float),
+        ('MaxAp4MaxFocal', c_float),
+        ('EXIF_MaxAp', c_float),
+        ('LensMake', c_char * 128),
+        ('Lens', c_char * 128),
+        ('LensSerial', c_char * 128),
+        ('InternalLensSerial', c_char * 128),
+        ('FocalLengthIn35mmFormat', c_ushort),
+        ('nikon', libraw_nikonlens_t),
+        ('dng', libraw_dnglens_t),
+        ('makernotes', libraw_makernotes_lens_t),
+    ]
+
+
+class libraw_makernotes_t(Structure):
+    _fields_ = [
+        ('canon', libraw_canon_makernotes_t),
+        ('nikon', libraw_nikon_makernotes_t),
+        ('hasselblad', libraw_hasselblad_makernotes_t),
+        ('fuji', libraw_fuji_info_t),
+        ('olympus', libraw_olympus_makernotes_t),
+        ('sony', libraw_sony_info_t),
+        ('kodak', libraw_kodak_makernotes_t),
+        ('panasonic', libraw_panasonic_makernotes_t),
+        ('pentax', libraw_pentax_makernotes_t),
+        ('phaseone', libraw_p1_makernotes_t),
+        ('common', libraw_metadata_common_t),    
+    ]
+
+
+class libraw_shootinginfo_t(Structure):
+    _fields_ = [
+        ('DriveMode', c_short),
+        ('FocusMode', c_short),
+        ('MeteringMode', c_short),
+        ('AFPoint', c_short),
+        ('ExposureMode', c_short),
+        ('ExposureProgram', c_short),
+        ('ImageStabilization', c_short),
+        ('BodySerial', c_char * 64),
+        ('InternalBodySerial', c_char * 64),
+    ]
+
+
+class libraw_custom_camera_t(Structure):
+    _fields_ = [
+        ('fsize', c_uint),
+        ('rw', c_ushort),
+        ('rh', c_ushort),
+        ('lm', c_ubyte),
+        ('tm', c_ubyte),
+        ('rm', c_ubyte),
+        ('bm', c_ubyte),
+        ('lf', c_ubyte),
+        ('cf', c_ubyte),
+        ('max', c_ubyte),
+        ('flags', c_ubyte),
+        ('t_make', c_char * 10),
+        ('t_model', c_char * 20),
+        ('offset', c_ushort)
+    ]
+
+    
+class libraw_rawdata_t(Structure):
+    """
+    The unpacked raw data of the current file (imgdata.rawdata, filled by unpack).
+    raw_image and visible_image are zero-copy NumPy views of LibRaw's bayer
+    buffer, writable, so changes are seen by dcraw_process. They do not keep
+    the buffer alive: arrays taken from them are only valid until the next
+    open, unpack, recycle or close of the handle; copy them to keep them.
+    raw2image still produces the 4-component imgdata.image, where only one
+    component per pixel is non-zero; that is data prepared for demosaic,
+    not a demosaiced image.
+    """
+    _fields_ = [
+        ('raw_alloc', c_void_p),
+        ('_raw_image', POINTER(c_ushort)),       
+        ('color4_image', POINTER(c_ushort * 4)),
+        ('color3_image', POINTER(c_ushort * 3)),
+        ('float_image', POINTER(c_float)),
+        ('float3_image', POINTER(c_float * 3)),
+        ('float4_image', POINTER(c_float * 4)),
+        ('ph1_black', POINTER(c_short * 2)),                
+        ('ph1_rblack', POINTER(c_short * 2)),
+        ('iparams', libraw_iparams_t),
+        ('sizes', libraw_image_sizes_t),        
+        ('ioparams', libraw_internal_output_params_t),
+        ('color', libraw_colordata_t),
+    ]
+
+    @property
+    def raw_image(self):
+        """
+        the full bayer mosaic (raw_height, raw_width) as a writable view of
+        LibRaw's buffer, strided by raw_pitch. None if the file has no bayer data.
+        Only valid until the handle is recycled or closed.
+        """
+        if not self._raw_image:
+            return None
+        size = (self.sizes.raw_height, self.sizes.raw_width)
+        strides = (self.sizes.raw_pitch, np.dtype(np.uint16).itemsize)
+        return _cached_array(self, self._raw_image, size, np.uint16, strides)
+
+    @property
+    def visible_image(self):
+        """
+        raw_image cropped to the visible area by top_margin/left_margin/height/width.
+        """
+        raw = self.raw_image
+        if raw is None:
+            return None
+        s = self.sizes
+        return raw[s.top_margin:s.top_margin + s.height, s.left_margin:s.left_margin + s.width]
+        
+    
+class libraw_data_t(Structure): # is LibRaw.imgdata
+    _fields_ = [
+        ('_image', POINTER(c_ushort * 4)),        
+        ('sizes', libraw_image_sizes_t),
+        ('idata', libraw_iparams_t),
+        ('lens', libraw_lensinfo_t),
+        ('makernotes', libraw_makernotes_t),
+        ('shootinginfo', libraw_shootinginfo_t),
+        ('params', libraw_output_params_t),
+        ('progress_flags', c_uint),
+        ('process_warnings', c_uint),
+        ('color', libraw_colordata_t),
+        ('other', libraw_imgother_t),
+        ('thumbnail', libraw_thumbnail_t),
+        ('rawdata', libraw_rawdata_t),
+        ('parent_class', c_void_p),
+    ]
+
+    @property
+    def image(self):       
+        if not self._image:
+            return None
+        size = (self.sizes.iheight, self.sizes.iwidth, 4)
+        return _cached_array(self, self._image, size, np.uint16)
+
+
+class fuji_compressed_params(Structure):
+    _fields_ = [
+        ('q_table', POINTER(c_int8)),  # quantization table
+        ('q_points', c_int * 5),      # quantization points
+        ('max_bits', c_int),
+        ('min_value', c_int),
+        ('raw_bits', c_int),
+        ('total_values', c_int),
+        ('maxDiff', c_int),
+        ('line_width', c_ushort),
+    ]
+
+class _c_path(c_char_p):
+    """
+    a char* argument that also accepts str and os.PathLike.
+    """
+    @classmethod
+    def from_param(cls, value):
+        if value is not None and not isinstance(value, bytes):
+            value = os.fsencode(value)
+        return c_char_p.from_param(value)
+
+# callback types
+memory_callback = CFUNCTYPE(None, c_void_p, c_char_p, c_char_p)
+exif_parser_callback = CFUNCTYPE(None, c_void_p, c_int, c_int, c_int, c_uint, c_void_p, c_longlong)
+data_callback = CFUNCTYPE(None, c_void_p, c_char_p, c_int)
+progress_callback = CFUNCTYPE(c_int, c_void_p, c_int, c_int, c_int)
+
+# marks functions returning a LibRaw error code, which raise instead
+_ERR = "error"
+
+_H = POINTER(libraw_data_t)
+
+# functions that do not take a handle: name -> (restype, argtypes)
+_FUNCTIONS = {
+    "init": (_H, [c_uint]),
+    "strerror": (c_char_p, [c_int]),
+    "strprogress": (c_char_p, [c_int]),
+    "version": (c_char_p, []),
+    "versionNumber": (c_int, []),
+    "cameraList": (POINTER(c_char_p), []),
+    "cameraCount": (c_int, []),
+    "capabilities": (c_uint, []),
+    "dcraw_clear_mem": (None, [POINTER(libraw_processed_image_t)]),
+}
+
+# functions taking the handle first: name -> (restype, argtypes after the handle)
+# LibRaw gets a method for each of them
+_METHODS = {
+    # opening and decoding
+    "open_file": (_ERR, [_c_path]),
+    "open_file_ex": (_ERR, [_c_path, c_longlong]),
+    "open_buffer": (_ERR, [c_void_p, c_size_t]),
+    "open_bayer": (_ERR, [c_void_p, c_uint, c_ushort, c_ushort, c_ushort, c_ushort, c_ushort, c_ushort,
+                          c_ubyte, c_ubyte, c_uint, c_uint, c_uint]),
+    "unpack": (_ERR, []),
+    "unpack_thumb": (_ERR, []),
+    "recycle_datastream": (None, []),
+    "recycle": (None, []),
+    "close": (None, []),
+    "subtract_black": (None, []),
+    "raw2image": (_ERR, []),
+    "free_image": (None, []),
+    "adjust_sizes_info_only": (_ERR, []),
+    "unpack_function_name": (c_char_p, []),
+    "get_decoder_info": (_ERR, [POINTER(libraw_decoder_info_t)]),
+    "COLOR": (c_int, [c_int, c_int]),
+    # processing and output
+    "dcraw_process": (_ERR, []),
+    "dcraw_ppm_tiff_writer": (_ERR, [_c_path]),
+    "dcraw_thumb_writer": (_ERR, [_c_path]),
+    "dcraw_make_mem_image": (POINTER(libraw_processed_image_t), [POINTER(c_int)]),
+    "dcraw_make_mem_thumb": (POINTER(libraw_processed_image_t), [POINTER(c_int)]),
+    # callbacks
+    "set_memerror_handler": (None, [memory_callback, c_void_p]),
+    "set_exifparser_handler": (None, [exif_parser_callback, c_void_p]),
+    "set_dataerror_handler": (None, [data_callback, c_void_p]),
+    "set_progress_handler": (None, [progress_callback, c_void_p]),
+    # setters
+    "set_demosaic": (None, [c_int]),
+    "set_output_color": (None, [c_int]),
+    "set_user_mul": (None, [c_int, c_float]),
+    "set_output_bps": (None, [c_int]),
+    "set_gamma": (None, [c_int, c_float]),
+    "set_no_auto_bright": (None, [c_int]),
+    "set_bright": (None, [c_float]),
+    "set_highlight": (None, [c_int]),
+    "set_fbdd_noiserd": (None, [c_int]),
+    "set_output_tif": (None, [c_int]),
+    # getters
+    "get_raw_height": (c_int, []),
+    "get_raw_width": (c_int, []),
+    "get_iheight": (c_int, []),
+    "get_iwidth": (c_int, []),
+    "get_cam_mul": (c_float, [c_int]),
+    "get_pre_mul": (c_float, [c_int]),
+    "get_rgb_cam": (c_float, [c_int, c_int]),
+    "get_color_maximum": (c_int, []),
+    "get_iparams": (POINTER(libraw_iparams_t), []),
+    "get_lensinfo": (POINTER(libraw_lensinfo_t), []),
+    "get_imgother": (POINTER(libraw_imgother_t), []),
+}
+
+def _check_error(result, func, args):
+    if result != 0:
+        raise Exception(strerror(result))
+    return result
+
+def _decode(result, func, args):
+    return result.decode("utf-8") if result is not None else None
+
+def _contents(result, func, args):
+    return result.contents if result else None
+
+def _raise(e):
+    raise e
+
+# prototyped functions of the loaded library, by name without "libraw_"
+_api = {}
+
+def _prototype(hdl):
+    """
+    declare restype/argtypes of the LibRaw C API. Functions missing from
+    this build of the library raise AttributeError when called.
+    """
+    for table, handle in ((_FUNCTIONS, []), (_METHODS, [_H])):
+        for name, (restype, argtypes) in table.items():
+            try:
+                fn = getattr(hdl, "libraw_" + name)
+            except AttributeError as e:
+                _api[name] = lambda *args, e=e: _raise(e)
+                continue
+            if restype is _ERR:
+                fn.restype = c_int
+                fn.errcheck = _check_error
+            else:
+                fn.restype = restype
+                if handle and restype is c_char_p:
+                    fn.errcheck = _decode
+                elif handle and name.startswith("get_") and restype is not None and issubclass(restype, _Pointer):
+                    fn.errcheck = _contents
+            fn.argtypes = handle + argtypes
+            _api[name] = fn
+
+# buffer from memory definition
+_buffer_from_memory = None
+if sys.version_info.major >= 3: #  Python3
+    _buffer_from_memory = lambda ptr, size: pythonapi.PyMemoryView_FromMemory(ptr, size, 0x200)  # writable
+    pythonapi.PyMemoryView_FromMemory.restype = py_object
+else:
+    _buffer_from_memory = pythonapi.PyBuffer_FromReadWriteMemory
+    _buffer_from_memory.restype = py_object
+
+def _view_cache(struct):
+    """
+    the dict of cached arrays of the handle struct belongs to.
+    Nested structures share it through their _b_base_ chain.
+    """
+    while struct._b_base_ is not None:
+        struct = struct._b_base_
+    try:
+        return struct._views
+    except AttributeError:
+        struct._views = {}
+        return struct._views
+
+def _cached_array(struct, ptr, shape, type, strides=None, transpose=False):
+    """
+    _array_from_memory for a field of struct, reused between accesses.
+    Keyed by address and shape, so a reallocated buffer gets a new array;
+    LibRaw also drops the cache whenever it may have reallocated.
+    """
+    addr = addressof(ptr) if isinstance(ptr, Array) else cast(ptr, c_void_p).value
+    key = (addr, shape, type, strides, transpose)
+    cache = _view_cache(struct)
+    arr = cache.get(key)
+    if arr is None:
+        arr = _array_from_memory(ptr, shape, type, strides)
+        if transpose:
+            arr = arr.T
+        cache[key] = arr
+    return arr
+
+def _array_from_memory(ptr, shape, type, strides=None):
+    itemsize = np.dtype(type).itemsize
+    if strides is None:
+        size = int(np.prod(shape) * itemsize)
+        return np.frombuffer(_buffer_from_memory(ptr, size), type).reshape(shape)
+    # last row may be shorter than the pitch
+    size = int((shape[0] - 1) * strides[0] + shape[1] * itemsize) if shape[0] else 0
+    return np.ndarray(shape, type, _buffer_from_memory(ptr, size), 0, strides)
+    
+def strerror(e):
+    return _lib().libraw_strerror(e).decode("utf-8")
+
+def strprogress(stage):
+    return _lib().libraw_strprogress(stage).decode("utf-8")
+
+def version():
+    return _lib().libraw_version().decode("utf-8")
+
+def versionNumber():
+    v = _lib().libraw_versionNumber()
+    return ((v >> 16) & 0x0000ff, (v >> 8) & 0x0000ff, v & 0x0000ff)
+
+def capabilities():
+    return _lib().libraw_capabilities()
+
+def cameraList():
+    """
+    the names of all cameras supported by the library.
+    """
+    lib = _lib()
+    names = lib.libraw_cameraList()
+    return [names[i].decode("utf-8") for i in range(lib.libraw_cameraCount())]
+    
+# LibRaw calls after which image buffers may have been (re)allocated
+_REALLOCATING = {
+    "open_file", "open_datastream", "open_bayer", "unpack", "raw2image", "raw2image_ex",
+    "free_image", "dcraw_process", "subtract_black", "adjust_sizes_info_only", "unpack_thumb",
+}
+
+# LibRaw calls that open a file without the buffer of an earlier open_buffer
+_OPENING = {"open_file", "open_file_ex", "open_datastream"}
+
+ColorCalibration = collections.namedtuple("ColorCalibration", [
+    "filters", "colors", "cdesc", "black", "cblack", "data_maximum", "maximum",
+    "curve", "cam_mul", "pre_mul", "cmatrix", "rgb_cam", "cam_xyz", "dng_color",
+])
+ColorCalibration.__doc__ = "an immutable copy of a file's color calibration, see snapshot()"
+
+DngColor = collections.namedtuple("DngColor", "illuminant calibration colormatrix forwardmatrix")
+
+def _frozen(arr):
+    arr = np.array(arr)
+    arr.flags.writeable = False
+    return arr
+
+def snapshot(imgdata):
+    """
+    copy the color calibration out of imgdata into a ColorCalibration of
+    read-only arrays that stays valid after the handle is recycled and is
+    cheap to pickle for worker processes. cblack is cut to the used part
+    and an identity curve is stored as None.
+    """
+    color = imgdata.color
+    cblack = color.cblack
+    curve = color.curve
+    dng = tuple(DngColor(d.illuminant, _frozen(d.calibration), _frozen(d.colormatrix), _frozen(d.forwardmatrix))
+                for d in color.dng_color)
+    return ColorCalibration(
+        filters=imgdata.idata.filters,
+        colors=imgdata.idata.colors,
+        cdesc=imgdata.idata.cdesc,
+        black=color.black,
+        cblack=_frozen(cblack[:6 + cblack[4] * cblack[5]]),
+        data_maximum=color.data_maximum,
+        maximum=color.maximum,
+        curve=None if np.array_equal(curve, _IDENTITY_CURVE) else _frozen(curve),
+        cam_mul=_frozen(color.cam_mul),
+        pre_mul=_frozen(color.pre_mul),
+        cmatrix=_frozen(color.cmatrix),
+        rgb_cam=_frozen(color.rgb_cam),
+        cam_xyz=_frozen(color.cam_xyz),
+        dng_color=dng,
+    )
+
+_IDENTITY_CURVE = np.arange(0x10000, dtype=np.uint16)
+
+class LibRaw:
+    def __init__(self, flags=0):
+        if versionNumber()[1] != 20:
+            sys.stdout.write("libraw.py: warning - structure definitions are not compatible with your version.\n")
+        
+        self._proc = _lib().libraw_init(flags)
+        assert(self._proc.contents)
+        self.imgdata = self._proc.contents
+        self._buffer = None  # input passed to open_buffer, kept alive while LibRaw reads it
+        self._callbacks = {}  # ctypes wrappers of the handlers set on this handle
+        # frees the handle once this object is garbage collected, unless close() ran first
+        self._finalizer = weakref.finalize(self, _lib().libraw_close, self._proc)
+        
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        rawfun = getattr(_lib(), "libraw_" + name)
+        
+        def handler(*args):
+            if self._proc is None:
+                raise ValueError("LibRaw handle is closed")
+            # do not pass python strings to C
+            args = [a.encode("utf-8") if isinstance(a, str) else a for a in args]
+            
+            e = rawfun(self._proc, *args)
+            if name in _REALLOCATING:
+                self._invalidate()
+            if e != 0:
+                raise Exception(strerror(e))
+        
+        setattr(self, name, handler)  # cache value
+        return handler
+
+    def _invalidate(self):
+        """
+        drop cached arrays, the buffers behind them may have moved.
+        """
+        if self._proc is not None:
+            vars(self._proc).pop("_views", None)
+
+    def snapshot(self):
+        """
+        copy the color calibration of the current file, see snapshot().
+        """
+        return snapshot(self.imgdata)
+
+    @classmethod
+    def from_file(cls, path, mmap=True, flags=0):
+        """
+        create a handle and open path. With mmap the file is memory-mapped
+        and handed to open_buffer instead of going through stdio.
+        """
+        proc = cls(flags)
+        try:
+            if mmap:
+                with open(path, "rb") as f:
+                    proc.open_buffer(_mmap(f.fileno(), 0, access=ACCESS_READ))
+            else:
+                proc.open_file(path)
+        except Exception:
+            proc.close()
+            raise
+        return proc
+
+    def open(self, source):
+        """
+        open source, either a path (str or os.PathLike) or a buffer holding the file.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            self.open_file(os.fspath(source))
+        else:
+            self.open_buffer(source)
+
+    def open_buffer(self, data):
+        """
+        open a raw file held in memory. data may be any contiguous buffer
+        (bytes, bytearray, memoryview, mmap, numpy array); it is not copied
+        and is referenced until the next open, recycle or close.
+        """
+        if self._proc is None:
+            raise ValueError("LibRaw handle is closed")
+        buf = np.frombuffer(data, np.uint8)
+        try:
+            _api["open_buffer"](self._proc, buf.ctypes.data, buf.nbytes)
+        finally:
+            self._invalidate()
+        self._buffer = buf
+
+    def open_bayer(self, data, raw_width, raw_height, left_margin=0, top_margin=0, right_margin=0, bottom_margin=0,
+                   procflags=0, bayer_pattern=LIBRAW_OPENBAYER_RGGB, unused_bits=0, otherflags=0, black_level=0):
+        """
+        open a bare bayer frame of raw_width x raw_height samples held in
+        memory. The sample size follows from len(data): 8 bit, packed 10 or
+        12 bit, or 16 bit little-endian (a uint16 array). Like open_buffer
+        the data is not copied and is referenced until the next open.
+        """
+        if self._proc is None:
+            raise ValueError("LibRaw handle is closed")
+        buf = np.frombuffer(data, np.uint8)
+        try:
+            _api["open_bayer"](self._proc, buf.ctypes.data, buf.nbytes, raw_width, raw_height,
+                               left_margin, top_margin, right_margin, bottom_margin,
+                               procflags, bayer_pattern, unused_bits, otherflags, black_level)
+        finally:
+            self._invalidate()
+        self._buffer = buf
+
+    def _processed_image(self, name):
+        """
+        call dcraw_make_mem_image/thumb and wrap the result in an array that
+        owns the allocation: (height, width, colors) for bitmaps, the flat
+        bytes for JPEG thumbnails.
+        """
+        if self._proc is None:
+            raise ValueError("LibRaw handle is closed")
+        e = c_int(0)
+        img = _api[name](self._proc, byref(e))
+        if not img:
+            raise Exception(strerror(e.value))
+        clear = _api["dcraw_clear_mem"]
+        try:
+            hdr = img.contents
+            ptr = c_void_p(addressof(hdr) + libraw_processed_image_t.data.offset)
+            if hdr.type == LIBRAW_IMAGE_BITMAP:
+                dtype = np.uint8 if hdr.bits == 8 else np.uint16
+                arr = _array_from_memory(ptr, (hdr.height, hdr.width, hdr.colors), dtype)
+            elif hdr.type == LIBRAW_IMAGE_JPEG:
+                arr = _array_from_memory(ptr, (hdr.data_size,), np.uint8)
+            else:
+                raise Exception("unexpected processed image type {}".format(hdr.type))
+        except Exception:
+            clear(img)
+            raise
+        # free with the array that wraps the buffer: views of arr, slices of
+        # the returned image included, keep that one alive rather than arr
+        owner = arr
+        while isinstance(owner.base, np.ndarray):
+            owner = owner.base
+        weakref.finalize(owner, clear, img)
+        return arr
+
+    def dcraw_make_mem_image(self):
+        """
+        return the result of dcraw_process as a (height, width, colors) uint8
+        or uint16 array. The array uses LibRaw's allocation directly, which is
+        released with libraw_dcraw_clear_mem once the array is garbage collected.
+        """
+        return self._processed_image("dcraw_make_mem_image")
+
+    def dcraw_make_mem_thumb(self):
+        """
+        the unpacked thumbnail as an array like dcraw_make_mem_image; a JPEG
+        thumbnail comes back as a flat uint8 array of the file's bytes.
+        """
+        return self._processed_image("dcraw_make_mem_thumb")
+
+    def get_decoder_info(self):
+        info = libraw_decoder_info_t()
+        self._call("get_decoder_info", byref(info))
+        return info
+
+    def _set_handler(self, name, cbtype, cb):
+        # ctypes must keep the wrapper alive for as long as LibRaw may call it
+        cb = cbtype(cb) if cb is not None else cbtype()
+        self._callbacks[name] = cb
+        self._call(name, cb, None)
+
+    def set_memerror_handler(self, func):
+        """
+        func(file, where) is called when LibRaw runs out of memory. None removes it.
+        """
+        self._set_handler("set_memerror_handler", memory_callback,
+                          func and (lambda data, file, where: func(file, where)))
+
+    def set_dataerror_handler(self, func):
+        """
+        func(file, offset) is called on corrupt or truncated data. None removes it.
+        """
+        self._set_handler("set_dataerror_handler", data_callback,
+                          func and (lambda data, file, offset: func(file, offset)))
+
+    def set_exifparser_handler(self, func):
+        """
+        func(tag, type, len, ord, ifp, base) is called for every EXIF tag. None removes it.
+        """
+        self._set_handler("set_exifparser_handler", exif_parser_callback,
+                          func and (lambda data, *args: func(*args)))
+
+    def set_progress_handler(self, func):
+        """
+        func(stage, iteration, expected) is called as processing advances;
+        returning a true value cancels. None removes it.
+        """
+        self._set_handler("set_progress_handler", progress_callback,
+                          func and (lambda data, stage, iteration, expected: 1 if func(stage, iteration, expected) else 0))
+
+    def _call(self, name, *args):
+        proc = self._proc
+        if proc is None:
+            raise ValueError("LibRaw handle is closed")
+        return _api[name](proc, *args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def closed(self):
+        return self._proc is None
+
+    def recycle(self):
+        """
+        free the buffers of the current file, keeping the handle for the next one.
+        """
+        if self._proc is None:
+            raise ValueError("LibRaw handle is closed")
+        _api["recycle"](self._proc)
+        self._invalidate()
+        self._buffer = None
+
+    def close(self):
+        """
+        release the handle and everything it allocated. Safe to call twice.
+        """
+        self._invalidate()
+        self._finalizer()
+        self._proc = None
+        self.imgdata = None
+        self._buffer = None
+
+def _method(name):
+    restype = _METHODS[name][0]
+    reallocating = name in _REALLOCATING
+    opening = name in _OPENING
+
+    def method(self, *args):
+        proc = self._proc
+        if proc is None:
+            raise ValueError("LibRaw handle is closed")
+        if reallocating or opening:
+            try:
+                _api[name](proc, *args)
+            finally:
+                self._invalidate()
+                if opening:
+                    # LibRaw has let go of the previous input
+                    self._buffer = None
+            return None
+        result = _api[name](proc, *args)
+        return None if restype is _ERR else result
+
+    method.__name__ = method.__qualname__ = name
+    method.__doc__ = "libraw_{}".format(name)
+    return method
+
+# bind the prototyped functions not wrapped by hand, so calls skip __getattr__
+for _name in _METHODS:
+    if not hasattr(LibRaw, _name):
+        setattr(LibRaw, _name, _method(_name))
+del _name
+
+
+class LibRawPool:
+    """
+    A bounded pool of pre-initialised LibRaw handles.
+
+    Handles are recycled when returned instead of being closed, so the
+    libraw_init cost is paid once per handle rather than once per file.
+    At most size handles exist; acquire blocks while all are in use.
+
+        with LibRawPool(4) as pool:
+            with pool.handle() as proc:
+                proc.open_file(path)
+                ...
+    """
+    def __init__(self, size=None, flags=0):
+        self.size = size or os.cpu_count() or 1
+        self._idle = queue.LifoQueue()  # reuse the most recently warmed handle first
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._closed = False
+        self._flags = flags
+        for _ in range(self.size):
+            self._idle.put(LibRaw(flags))
+
+    def acquire(self, timeout=None):
+        """
+        take a handle out of the pool, waiting up to timeout seconds.
+        """
+        if self._closed:
+            raise ValueError("LibRawPool is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("no LibRaw handle available")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            # close() emptied the pool after the check above
+            self._slots.release()
+            raise ValueError("LibRawPool is closed")
+
+    def release(self, proc):
+        """
+        recycle proc and put it back into the pool. A handle that cannot be
+        recycled, e.g. because it was closed, is replaced by a new one.
+        """
+        try:
+            if self._closed:
+                proc.close()
+                return
+            try:
+                proc.recycle()
+            except Exception:
+                proc.close()
+                proc = LibRaw(self._flags)
+            self._idle.put(proc)
+        finally:
+            self._slots.release()
+
+    @contextlib.contextmanager
+    def handle(self, timeout=None):
+        proc = self.acquire(timeout)
+        try:
+            yield proc
+        finally:
+            self.release(proc)
+
+    def close(self):
+        """
+        close all idle handles. Handles still out are closed when released.
+        """
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
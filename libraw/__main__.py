@@ -0,0 +1,258 @@
+"""
+@package libraw.__main__
+Convert raw files or whole directories of them:
+
+    python3 -m libraw [-j N] [-f ppm|tiff|npy] [-o OUTDIR] <rawfile or dir> ...
+
+Without options every file is developed to a .ppm next to it.
+With -j N the files are decoded in N worker processes; the developed images
+come back to this process through shared memory instead of being pickled.
+Files whose output is newer than the input are skipped unless --force is given.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from libraw import LibRaw, writers
+from libraw.batch import find_files
+
+FORMATS = {"ppm": ".ppm", "tiff": ".tiff", "npy": ".npy"}
+
+STAGES = ("open", "unpack", "process", "transfer", "write")
+
+def find_inputs(args, outdir, ext):
+    """
+    yield (input, output) pairs for the files and directories in args.
+    """
+    for arg in args:
+        for src in find_files([arg]):
+            if outdir:
+                rel = os.path.relpath(os.path.dirname(src), arg) if os.path.isdir(arg) else ""
+                dest = os.path.normpath(os.path.join(outdir, rel))
+            else:
+                dest = os.path.dirname(src)
+            yield src, os.path.join(dest, os.path.splitext(os.path.basename(src))[0] + ext)
+
+def up_to_date(src, dst):
+    try:
+        return os.stat(dst).st_mtime >= os.stat(src).st_mtime
+    except OSError:
+        return False
+
+_proc = None
+
+def _init_worker(params):
+    global _proc
+    _proc = LibRaw()
+    for name, value in params.items():
+        setattr(_proc.imgdata.params, name, value)
+
+def _develop(path):
+    """
+    decode path on this process' handle. Returns the image and stage timings.
+    """
+    times = {}
+    t = time.perf_counter()
+    try:
+        _proc.open_file(path)
+        times["open"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        _proc.unpack()
+        times["unpack"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        _proc.dcraw_process()
+        img = _proc.dcraw_make_mem_image()
+        times["process"] = time.perf_counter() - t
+    finally:
+        _proc.recycle()
+    return img, times
+
+def _develop_shared(path):
+    """
+    worker side: decode and copy the image into a new shared memory block.
+    The parent attaches to it by name and unlinks it.
+    """
+    img, times = _develop(path)
+    t = time.perf_counter()
+    shm = shared_memory.SharedMemory(create=True, size=max(img.nbytes, 1))
+    try:
+        np.ndarray(img.shape, img.dtype, shm.buf)[...] = img
+        name = shm.name
+    finally:
+        shm.close()
+    # ownership passes to the parent, which unlinks the block
+    resource_tracker.unregister(shm._name, "shared_memory")
+    times["transfer"] = time.perf_counter() - t
+    return name, img.shape, img.dtype.str, times
+
+def _attach(name, shape, dtype):
+    """
+    parent side: map the block a worker filled. Returns the array and the block.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype, shm.buf), shm
+
+def _discard(future):
+    """
+    parent side: unlink the block of a worker result that will not be written.
+    """
+    if future.cancel():
+        return
+    try:
+        name = future.result()[0]
+        shm = shared_memory.SharedMemory(name=name)
+    except BaseException:
+        # the worker failed (or was interrupted) before handing a block over
+        return
+    shm.close()
+    shm.unlink()
+
+def _write(dst, img):
+    """
+    write img to a temporary file next to dst and rename it into place, so
+    an interrupted write never leaves a partial dst that looks up to date.
+    """
+    t = time.perf_counter()
+    directory, base = os.path.split(dst)
+    os.makedirs(directory or ".", exist_ok=True)
+    # keep the extension, it selects the writer
+    tmp = os.path.join(directory, ".{}.{}.tmp{}".format(base, os.getpid(), os.path.splitext(base)[1]))
+    try:
+        writers.write(tmp, img)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return time.perf_counter() - t
+
+def _report(src, times, verbose):
+    if verbose:
+        print("{}: {}".format(src, " ".join("{} {:.0f}ms".format(s, times[s] * 1e3) for s in STAGES if s in times)))
+
+def _written(src, times, future, verbose):
+    try:
+        times["write"] = future.result()
+    except Exception as e:
+        return src, e
+    _report(src, times, verbose)
+    return src, times
+
+def convert_serial(jobs, params, verbose):
+    """
+    each image is written on a background thread while the next one is decoded.
+    """
+    _init_worker(params)
+    with writers.BackgroundWriter() as background:
+        pending = collections.deque()
+        for src, dst in jobs:
+            try:
+                img, times = _develop(src)
+            except Exception as e:
+                yield src, e
+                continue
+            pending.append((src, times, background.submit(dst, img, _write)))
+            del img
+            while pending and (len(pending) > 1 or pending[0][2].done()):
+                yield _written(*pending.popleft(), verbose)
+        while pending:
+            yield _written(*pending.popleft(), verbose)
+
+def convert_parallel(jobs, params, workers, verbose):
+    """
+    at most 2 * workers images are decoded but not yet written at any time.
+    """
+    jobs = iter(jobs)
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(params,)) as executor:
+        pending = {}
+        try:
+            while True:
+                for src, dst in jobs:
+                    pending[executor.submit(_develop_shared, src)] = (src, dst)
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    break
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    src, dst = pending.pop(future)
+                    try:
+                        name, shape, dtype, times = future.result()
+                    except Exception as e:
+                        yield src, e
+                        continue
+                    t = time.perf_counter()
+                    img, shm = _attach(name, shape, dtype)
+                    times["transfer"] += time.perf_counter() - t
+                    try:
+                        times["write"] = _write(dst, img)
+                    except Exception as e:
+                        yield src, e
+                        continue
+                    finally:
+                        del img
+                        shm.close()
+                        shm.unlink()
+                    _report(src, times, verbose)
+                    yield src, times
+        finally:
+            # workers hand their blocks to this process, so blocks of results
+            # that were not written (interrupt, consumer stopped early) have
+            # to be unlinked here or they stay in /dev/shm
+            for future in pending:
+                _discard(future)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python3 -m libraw", description="convert raw files with LibRaw")
+    parser.add_argument("inputs", nargs="+", help="raw files or directories")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes")
+    parser.add_argument("-f", "--format", choices=sorted(FORMATS), default="ppm")
+    parser.add_argument("-b", "--bits", type=int, choices=(8, 16),
+                        help="bits per sample (default: 8 for ppm, 16 otherwise)")
+    parser.add_argument("-o", "--outdir", help="write outputs here instead of next to the inputs")
+    parser.add_argument("--force", action="store_true", help="also convert files whose output is up to date")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print per-file timings")
+    args = parser.parse_args(argv)
+
+    bits = args.bits or (8 if args.format == "ppm" else 16)
+    params = {"output_bps": bits}
+
+    jobs = [(src, dst) for src, dst in find_inputs(args.inputs, args.outdir, FORMATS[args.format])
+            if args.force or not up_to_date(src, dst)]
+    if not jobs:
+        print("nothing to do")
+        return 0
+
+    start = time.perf_counter()
+    totals = dict.fromkeys(STAGES, 0.0)
+    if args.jobs > 1:
+        results = convert_parallel(jobs, params, args.jobs, not args.quiet)
+    else:
+        results = convert_serial(jobs, params, not args.quiet)
+    failed = 0
+    for src, times in results:
+        if isinstance(times, Exception):
+            failed += 1
+            print("{}: {}".format(src, times), file=sys.stderr)
+            continue
+        for stage, t in times.items():
+            totals[stage] += t
+    wall = time.perf_counter() - start
+
+    print("{} files in {:.2f}s ({:.2f} files/s), {} failed".format(len(jobs), wall, len(jobs) / wall, failed))
+    print("stage totals: " + " ".join("{} {:.2f}s".format(s, totals[s]) for s in STAGES if totals[s]))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
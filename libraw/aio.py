@@ -0,0 +1,140 @@
+"""
+@package libraw.aio
+asyncio front end for LibRaw.
+
+LibRaw calls block for hundreds of milliseconds, so they run on a dedicated
+executor and are awaited from the event loop.
+
+AsyncLibRaw wraps a single handle:
+
+    async with AsyncLibRaw() as proc:
+        await proc.open_buffer(frame)
+        await proc.unpack()
+        await proc.dcraw_process()
+        rgb = await proc.dcraw_make_mem_image()
+
+AsyncProcessor decodes a stream of frames with a fixed number of handles.
+put() waits while the queue is full, so a burst of frames slows the producer
+down instead of piling up decoded images:
+
+    async with AsyncProcessor(concurrency=2, queue_size=4) as p:
+        await p.put(frame)
+        result = await p.get()
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+
+from libraw import LibRaw, LibRawPool
+from libraw.batch import Result, develop, _work
+
+class AsyncLibRaw:
+    """
+    a LibRaw handle whose methods are awaitables running on their own thread.
+    Attributes that are not methods, such as imgdata, are returned directly.
+    """
+    def __init__(self, flags=0, executor=None):
+        self._proc = LibRaw(flags)
+        self._own_executor = executor is None
+        self._executor = executor or concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="libraw")
+
+    def __getattr__(self, name):
+        attr = getattr(self._proc, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(attr, *args, **kwargs))
+
+        return call
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._proc.close)
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+class AsyncProcessor:
+    """
+    decode sources (paths or buffers) with up to concurrency handles at once.
+
+    func(proc) and params work as in libraw.batch.run. At most
+    concurrency + queue_size sources are accepted but not yet taken with get();
+    put() waits for room. Results are returned in completion order as
+    libraw.batch.Result tuples.
+    """
+    def __init__(self, func=develop, params=None, concurrency=2, queue_size=None):
+        self.func = func
+        self.params = params or {}
+        self.concurrency = concurrency
+        queue_size = concurrency if queue_size is None else queue_size
+        self._executor = concurrent.futures.ThreadPoolExecutor(concurrency, thread_name_prefix="libraw")
+        self._pool = LibRawPool(concurrency)
+        self._slots = asyncio.Semaphore(concurrency + queue_size)
+        self._results = asyncio.Queue()
+        self._tasks = set()
+
+    async def _run(self, source):
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self._executor, _work, self._pool, self.func, self.params, source)
+        except Exception as e:
+            result = Result(source, None, e)
+        await self._results.put(result)
+
+    async def put(self, source):
+        """
+        queue source for decoding, waiting while the processor is full.
+        """
+        await self._slots.acquire()
+        task = asyncio.ensure_future(self._run(source))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def get(self):
+        """
+        wait for the next finished Result and free its slot.
+        """
+        result = await self._results.get()
+        self._slots.release()
+        return result
+
+    async def process(self, source):
+        """
+        decode a single source and return func's value, raising its error.
+        Uses a slot like put(), so it is subject to the same limit.
+        """
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, _work, self._pool, self.func, self.params, source)
+        if result.error is not None:
+            raise result.error
+        return result.value
+
+    async def close(self):
+        """
+        wait for running decodes, then release the handles.
+        Results that were never taken with get() are dropped.
+        """
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        # process() calls may still be decoding; wait for them off the loop
+        await asyncio.get_running_loop().run_in_executor(None, self._shutdown)
+
+    def _shutdown(self):
+        self._executor.shutdown(wait=True)
+        self._pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,105 @@
+"""
+@package libraw.batch
+Decode many raw files in parallel on a thread pool.
+
+ctypes releases the GIL while LibRaw runs, so unpack and dcraw_process of
+different files overlap on a multi-core machine. Each worker takes a handle
+from a LibRawPool which is recycled between files.
+
+    for r in libraw.batch.run(paths, workers=4):
+        if r.error is None:
+            rgb = r.value
+"""
+
+import collections
+import concurrent.futures
+import os
+
+from libraw import LibRawPool
+
+Result = collections.namedtuple("Result", "source value error")
+
+# file extensions picked up when walking directories
+RAW_EXTENSIONS = {
+    ".jpg", ".jpeg", ".dng", ".cr2", ".cr3", ".crw", ".nef", ".nrw", ".arw", ".srf",
+    ".sr2", ".raf", ".orf", ".rw2", ".pef", ".srw", ".3fr", ".iiq", ".erf", ".kdc",
+    ".mrw", ".x3f", ".raw",
+}
+
+def find_files(paths, extensions=RAW_EXTENSIONS):
+    """
+    yield the files in paths, descending into directories for files with
+    one of extensions. Files given directly are always included, and
+    entries that are not paths (buffers) are passed through.
+    """
+    for path in paths:
+        if isinstance(path, (str, os.PathLike)) and os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in extensions:
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+def develop(proc):
+    """
+    default processing: unpack, dcraw_process and return the image as an array.
+    """
+    proc.unpack()
+    proc.dcraw_process()
+    return proc.dcraw_make_mem_image()
+
+def _work(pool, func, params, source):
+    with pool.handle() as proc:
+        for name, value in params.items():
+            setattr(proc.imgdata.params, name, value)
+        try:
+            proc.open(source)
+            return Result(source, func(proc), None)
+        except Exception as e:
+            return Result(source, None, e)
+
+def run(sources, func=develop, params=None, workers=None, ordered=True, max_in_flight=None):
+    """
+    process every path or buffer in sources and yield a Result per source.
+
+    func(proc) is called on an opened handle and its return value becomes
+    Result.value. It must not return views of the handle's buffers (such as
+    rawdata.raw_image), because the handle is recycled right after; copy them.
+    params are set on imgdata.params before each open.
+
+    With ordered results come in input order, otherwise as they complete.
+    At most max_in_flight (default 2 * workers) sources are being decoded or
+    waiting to be yielded at any time, which bounds memory use.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max(max_in_flight or 2 * workers, 1)
+    params = params or {}
+    sources = iter(sources)
+
+    with LibRawPool(workers) as pool, \
+            concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        pending = collections.deque()
+
+        def submit():
+            for source in sources:
+                pending.append(executor.submit(_work, pool, func, params, source))
+                if len(pending) >= max_in_flight:
+                    break
+
+        try:
+            submit()
+            while pending:
+                if ordered:
+                    done = pending.popleft()
+                else:
+                    finished, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    done = next(f for f in pending if f in finished)
+                    pending.remove(done)
+                result = done.result()
+                submit()
+                yield result
+        finally:
+            for f in pending:
+                f.cancel()
@@ -0,0 +1,102 @@
+"""
+@package libraw.bayer
+Develop bayer frames that are already in memory, such as frames from a
+sensor driver, with LibRaw's processing and no file I/O.
+
+    with BayerProcessor(4056, 3040, "BGGR", black=256, bits=12,
+                        params={"user_qual": 0, "half_size": 1}) as p:
+        out = None
+        for frame in camera:
+            out = p.process(frame, out)
+
+All frames go through libraw_open_bayer on one handle. The geometry, CFA
+pattern, levels and imgdata.params are set up once, and with out the image
+is copied into the same array every frame, so nothing is allocated per
+frame apart from LibRaw's own buffers, which it reuses when the size does
+not change.
+"""
+
+import numpy as np
+
+from libraw import (LibRaw, LIBRAW_OPENBAYER_RGGB, LIBRAW_OPENBAYER_BGGR,
+                    LIBRAW_OPENBAYER_GRBG, LIBRAW_OPENBAYER_GBRG)
+
+PATTERNS = {
+    "RGGB": LIBRAW_OPENBAYER_RGGB,
+    "BGGR": LIBRAW_OPENBAYER_BGGR,
+    "GRBG": LIBRAW_OPENBAYER_GRBG,
+    "GBRG": LIBRAW_OPENBAYER_GBRG,
+}
+
+class BayerProcessor:
+    """
+    develops width x height bayer frames (the whole readout, including
+    margins as (left, top, right, bottom) samples that are not image).
+
+    Frames are uint8 or uint16 arrays of width * height samples, or bytes
+    in any layout open_bayer understands (8 bit, packed 10/12 bit, 16 bit
+    little-endian). bits is the number of significant bits, which sets the
+    white level unless white is given. params are set on imgdata.params.
+    """
+    def __init__(self, width, height, pattern="RGGB", black=0, bits=None, white=None, margins=(0, 0, 0, 0),
+                 params=None, flags=0):
+        self.proc = LibRaw(flags)
+        self.width = width
+        self.height = height
+        self.pattern = PATTERNS[pattern] if isinstance(pattern, str) else pattern
+        self.black = black
+        self.white = white if white is not None or bits is None else (1 << bits) - 1
+        self._geometry = (width, height) + tuple(margins)
+        for name, value in (params or {}).items():
+            setattr(self.proc.imgdata.params, name, value)
+
+    def _frame(self, frame):
+        if not isinstance(frame, np.ndarray):
+            return frame
+        if frame.dtype.kind != "u" or frame.dtype.itemsize > 2 or frame.size != self.width * self.height:
+            raise ValueError("frame must hold {} x {} uint8 or uint16 samples".format(self.width, self.height))
+        # a copy is only made for strided or big-endian frames
+        return np.ascontiguousarray(frame.astype(frame.dtype.newbyteorder("<"), copy=False))
+
+    def open(self, frame):
+        """
+        open and unpack frame and return the handle, whose
+        imgdata.rawdata.raw_image is then the frame's mosaic. The frame
+        may be reused by the caller once this returns.
+        """
+        proc = self.proc
+        proc.open_bayer(self._frame(frame), *self._geometry, 0, self.pattern, 0, 0, self.black)
+        if self.white is not None:
+            proc.imgdata.color.maximum = self.white
+        proc.unpack()
+        return proc
+
+    def process(self, frame, out=None):
+        """
+        develop frame and return the (height, width, 3) image. When out is
+        given the image is copied into it and LibRaw's copy is freed at once.
+        """
+        proc = self.open(frame)
+        proc.dcraw_process()
+        img = proc.dcraw_make_mem_image()
+        if out is None:
+            return img
+        np.copyto(out, img)
+        return out
+
+    def map(self, frames, out=None):
+        """
+        yield the developed image of every frame. With out, every image is
+        written into out and must be consumed before the next is produced.
+        """
+        for frame in frames:
+            yield self.process(frame, out)
+
+    def close(self):
+        self.proc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,186 @@
+"""
+@package libraw.brcm
+Decode the raw bayer data that raspistill -r appends to its JPEGs without
+going through LibRaw.
+
+The payload is a 32 KiB header starting with "BRCM" followed by rows of
+packed 10 bit (OV5647, IMX219) or 12 bit (IMX477) samples in MIPI CSI-2
+order, each row padded to a multiple of 32 bytes. decode() unpacks them with
+vectorized bit operations into a uint16 mosaic:
+
+    raw = libraw.brcm.decode("image.jpg")
+    mosaic = raw.raw_image
+    raw.sizes.width, raw.idata.filters, raw.black
+"""
+
+import struct
+
+import numpy as np
+
+from libraw import libraw_image_sizes_t, libraw_iparams_t
+
+MAGIC = b"BRCM"
+HEADER_SIZE = 32768
+# the geometry is stored at this offset inside the header
+_INFO_OFFSET = 176
+_INFO = struct.Struct("<32s4H6I2H2B")
+
+# payload sizes of the known sensors, counted from the end of the file,
+# and their bit depth
+PAYLOAD_SIZES = {
+    6404096: ("ov5647", 10),
+    10270208: ("imx219", 10),
+    18711040: ("imx477", 12),
+}
+
+# header bayer_order -> (pattern, LibRaw filters)
+BAYER_ORDERS = {
+    0: ("RGGB", 0x94949494),
+    1: ("GBRG", 0x49494949),
+    2: ("BGGR", 0x16161616),
+    3: ("GRBG", 0x61616161),
+}
+
+BLACK_LEVELS = {10: 64, 12: 256}
+
+_SHIFT10 = np.array([0, 2, 4, 6], np.uint8)
+_SHIFT12 = np.array([0, 4], np.uint8)
+
+class BrcmHeader:
+    def __init__(self, name, width, height, padding_right, padding_down, transform, format, bayer_order, bayer_format):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.padding_right = padding_right
+        self.padding_down = padding_down
+        self.transform = transform
+        self.format = format
+        self.bayer_order = bayer_order
+        self.bayer_format = bayer_format
+
+    @property
+    def sensor(self):
+        return self.name.split(b"\0", 1)[0].decode("ascii", "replace").strip()
+
+def _as_bytes(source):
+    """
+    a flat uint8 view of source: a path, bytes-like object, mmap or array.
+    """
+    if isinstance(source, str) or hasattr(source, "__fspath__"):
+        return np.fromfile(source, np.uint8)
+    return np.frombuffer(source, np.uint8)
+
+def find_payload(data):
+    """
+    return the BRCM payload at the end of data as a uint8 view, or None.
+    """
+    data = _as_bytes(data)
+    for size in PAYLOAD_SIZES:
+        if len(data) >= size and data[-size:-size + 4].tobytes() == MAGIC:
+            return data[-size:]
+    # unknown sensor: fall back to searching for the magic
+    pos = data.tobytes().rfind(MAGIC)
+    if pos < 0 or len(data) - pos <= HEADER_SIZE:
+        return None
+    return data[pos:]
+
+def parse_header(payload):
+    fields = _INFO.unpack_from(payload, _INFO_OFFSET)
+    name, width, height, pad_right, pad_down = fields[:5]
+    transform, format, bayer_order, bayer_format = fields[-4:]
+    return BrcmHeader(name, width, height, pad_right, pad_down, transform, format, bayer_order, bayer_format)
+
+def _stride(width, bits):
+    return (width * bits // 8 + 31) // 32 * 32
+
+def _guess_bits(header, size):
+    """
+    the bit depth whose padded stride divides the pixel data into the
+    fewest rows that still cover the image.
+    """
+    candidates = []
+    for bits in (10, 12):
+        stride = _stride(header.width, bits)
+        if size % stride == 0 and size // stride >= header.height:
+            candidates.append((size // stride - header.height, bits))
+    if not candidates:
+        raise ValueError("cannot determine bit depth of {}x{} BRCM data".format(header.width, header.height))
+    return min(candidates)[1]
+
+def unpack10(rows, width, out=None):
+    """
+    unpack (height, >= width * 5 / 4) bytes of MIPI RAW10 into (height, width) uint16.
+    """
+    h = rows.shape[0]
+    packed = rows[:, :width * 5 // 4].reshape(h, width // 4, 5)
+    if out is None:
+        out = np.empty((h, width), np.uint16)
+    elif out.shape != (h, width) or out.dtype != np.uint16 or not out.flags.c_contiguous:
+        raise ValueError("out must be a contiguous ({}, {}) uint16 array".format(h, width))
+    o = out.reshape(h, width // 4, 4)
+    np.left_shift(packed[..., :4], 2, out=o, dtype=np.uint16)
+    o |= (packed[..., 4:] >> _SHIFT10) & 0x3
+    return out
+
+def unpack12(rows, width, out=None):
+    """
+    unpack (height, >= width * 3 / 2) bytes of MIPI RAW12 into (height, width) uint16.
+    """
+    h = rows.shape[0]
+    packed = rows[:, :width * 3 // 2].reshape(h, width // 2, 3)
+    if out is None:
+        out = np.empty((h, width), np.uint16)
+    elif out.shape != (h, width) or out.dtype != np.uint16 or not out.flags.c_contiguous:
+        raise ValueError("out must be a contiguous ({}, {}) uint16 array".format(h, width))
+    o = out.reshape(h, width // 2, 2)
+    np.left_shift(packed[..., :2], 4, out=o, dtype=np.uint16)
+    o |= (packed[..., 2:] >> _SHIFT12) & 0xF
+    return out
+
+class BrcmRaw:
+    """
+    a decoded BRCM mosaic. sizes and idata mirror LibRaw's imgdata.sizes
+    and imgdata.idata so code written against LibRaw can use either.
+    """
+    def __init__(self, raw_image, header, bits):
+        self.raw_image = raw_image
+        self.header = header
+        self.bits = bits
+        self.black = BLACK_LEVELS[bits]
+        self.maximum = (1 << bits) - 1
+
+        h, w = raw_image.shape
+        self.sizes = libraw_image_sizes_t(
+            raw_height=h, raw_width=w, height=h, width=w, iheight=h, iwidth=w,
+            raw_pitch=w * raw_image.itemsize, pixel_aspect=1.0)
+
+        pattern, filters = BAYER_ORDERS[header.bayer_order]
+        self.pattern = pattern
+        self.idata = libraw_iparams_t(
+            make=b"RaspberryPi", model=header.sensor.encode("ascii", "replace"),
+            normalized_make=b"RaspberryPi", normalized_model=header.sensor.encode("ascii", "replace"),
+            raw_count=1, colors=3, filters=filters, cdesc=b"RGBG")
+
+    @property
+    def visible_image(self):
+        return self.raw_image
+
+def decode(source, out=None, bits=None):
+    """
+    decode the BRCM payload of a raspistill -r JPEG.
+    source is a path or a buffer with the file contents; out an optional
+    preallocated (height, width) uint16 array to unpack into.
+    """
+    payload = find_payload(source)
+    if payload is None:
+        raise ValueError("no BRCM raw data found")
+    header = parse_header(payload)
+    pixels = payload[HEADER_SIZE:]
+    if bits is None:
+        known = PAYLOAD_SIZES.get(len(payload))
+        bits = known[1] if known else _guess_bits(header, len(pixels))
+    stride = _stride(header.width, bits)
+    rows = pixels[:len(pixels) // stride * stride].reshape(-1, stride)[:header.height]
+
+    unpack = unpack10 if bits == 10 else unpack12
+    return BrcmRaw(unpack(rows, header.width, out), header, bits)
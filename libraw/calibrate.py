@@ -0,0 +1,290 @@
+"""
+@package libraw.calibrate
+Master dark and flat frames and their correction in the raw domain.
+
+LibRaw's dark_frame parameter (-K) takes a PGM that is read again for every
+file and there is no flat-field correction. A Library keeps master frames
+as .npy files in a directory, keyed by what they depend on:
+
+    dark    camera model, ISO, exposure time and sensor temperature
+    flat    camera model and ISO
+
+    lib = Library("/data/calibration")
+    lib.build_dark(dark_paths)
+    lib.build_flat(flat_paths)
+
+    proc.open_file(path)
+    proc.unpack()
+    lib.correct(proc)          # raw_image is corrected in place
+    proc.dcraw_process()
+
+Masters are built by streaming the frames through libraw.stack, so any
+number of frames fits in memory. They are opened with np.load(mmap_mode="r"):
+worker processes that use the same Library (it pickles as its directory)
+map the same files and share their pages instead of holding copies.
+
+A dark is used for files within temperature_tolerance degrees of it; files
+without a sensor temperature only match darks without one. The flat is
+stored as the gain that brings every pixel to the mean of its CFA position.
+"""
+
+import collections
+import json
+import os
+import re
+
+import numpy as np
+
+from libraw import cfa
+from libraw.batch import run
+from libraw.stack import Stacker
+
+Key = collections.namedtuple("Key", "model iso exposure temperature")
+
+_INDEX = "index.json"
+
+def key(imgdata):
+    """
+    the Key of an opened file. temperature is None when the camera does
+    not report one.
+    """
+    temperature = imgdata.makernotes.common.SensorTemperature
+    return Key(
+        model=imgdata.idata.model.split(b"\0", 1)[0].decode("utf-8", "replace"),
+        iso=round(imgdata.other.iso_speed),
+        exposure=round(imgdata.other.shutter, 6),
+        temperature=round(temperature, 1) if -273 < temperature < 1000 else None,
+    )
+
+def _black(op, strip, start, black, level_rows):
+    """
+    op (np.add or np.subtract) the black level in place to the mosaic rows
+    of strip, which starts at row start.
+    """
+    if level_rows is None:
+        op(strip, black, out=strip)
+        return
+    period = len(level_rows)
+    for dy in range(period):
+        rows = strip[(dy - start) % period::period]
+        op(rows, level_rows[dy], out=rows)
+
+def correct(mosaic, dark=None, gain=None, black=0, maximum=0xFFFF, rows=256, out=None):
+    """
+    (mosaic - dark) * gain + black, clipped to [0, maximum], into out
+    (default: mosaic itself). dark holds the black level, which is why it
+    is added back; gain multiplies the signal above black when there is no
+    dark. black is a number or, for per-channel black levels, an array of
+    the level at every position of the CFA tile, repeated over the mosaic.
+    The work is done in float32 strips of rows rows.
+    """
+    if out is None:
+        out = mosaic
+    height, width = mosaic.shape
+    levels = np.asarray(black, np.float32)
+    level_rows = None
+    if levels.ndim:
+        # the levels of every tile row across the whole width
+        level_rows = np.tile(levels, (1, -(-width // levels.shape[1])))[:, :width]
+    buf = np.empty((min(rows, height), width), np.float32)
+    for start in range(0, height, rows):
+        stop = min(start + rows, height)
+        b = buf[:stop - start]
+        np.copyto(b, mosaic[start:stop], casting="unsafe")
+        if dark is not None:
+            b -= dark[start:stop]
+        else:
+            _black(np.subtract, b, start, black, level_rows)
+        if gain is not None:
+            b *= gain[start:stop]
+        _black(np.add, b, start, black, level_rows)
+        np.clip(b, 0, maximum, out=b)
+        np.rint(b, out=b)
+        np.copyto(out[start:stop], b, casting="unsafe")
+    return out
+
+def flat_gain(flat, black=0, period=2):
+    """
+    the float32 gain map of a master flat: for every position in the
+    period x period CFA tile, the mean of that position over the pixel.
+    Pixels at or below black get gain 1.
+    """
+    signal = flat.astype(np.float32) - black
+    gain = np.ones(flat.shape, np.float32)
+    for dy in range(period):
+        for dx in range(period):
+            s = signal[dy::period, dx::period]
+            g = gain[dy::period, dx::period]
+            valid = s > 0
+            if valid.any():
+                np.divide(s[valid].mean(), s, out=g, where=valid)
+    return gain
+
+def _levels(imgdata):
+    """
+    the black level of the raw_image in imgdata: color.black, or with
+    per-channel offsets in cblack the level at every position of the CFA.
+    """
+    color = imgdata.color
+    cblack = [int(c) for c in color.cblack[:4]]
+    if not any(cblack):
+        return color.black
+    tile = cfa.from_imgdata(imgdata, raw=True).tile
+    return np.array([[color.black + cblack[c] for c in row] for row in tile], np.float32)
+
+def _frame(proc):
+    proc.unpack()
+    raw = proc.imgdata.rawdata.raw_image
+    if raw is None:
+        raise ValueError("not a bayer raw file")
+    return key(proc.imgdata), proc.imgdata.color.black, raw.copy()
+
+def _name(kind, key):
+    parts = [kind, re.sub(r"[^A-Za-z0-9.-]+", "-", key.model), "iso{}".format(key.iso)]
+    if kind == "dark":
+        parts.append("{:g}s".format(key.exposure))
+        if key.temperature is not None:
+            parts.append("{:g}C".format(key.temperature))
+    return "_".join(parts) + ".npy"
+
+class Library:
+    """
+    the master frames in directory, which is created if needed.
+    """
+    def __init__(self, directory, temperature_tolerance=5.0):
+        self.directory = directory
+        self.temperature_tolerance = temperature_tolerance
+        os.makedirs(directory, exist_ok=True)
+        self._maps = {}
+        self._index = None, {}  # (mtime, contents) of index.json
+
+    def __getstate__(self):
+        # workers map the files themselves
+        return {"directory": self.directory, "temperature_tolerance": self.temperature_tolerance}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._maps = {}
+        self._index = None, {}
+
+    def index(self):
+        """
+        {file name: {"kind", "model", "iso", "exposure", "temperature", "frames", "black"}}
+        """
+        path = os.path.join(self.directory, _INDEX)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if self._index[0] != mtime:
+            with open(path) as f:
+                self._index = mtime, json.load(f)
+        return self._index[1]
+
+    def _store(self, kind, key, master, frames, black):
+        name = _name(kind, key)
+        path = os.path.join(self.directory, name)
+        tmp = path + ".tmp.npy"
+        np.save(tmp, master)
+        os.replace(tmp, path)
+        index = dict(self.index())
+        index[name] = dict(key._asdict(), kind=kind, frames=frames, black=black)
+        tmp = os.path.join(self.directory, _INDEX + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp, os.path.join(self.directory, _INDEX))
+        self._maps.pop(name, None)
+        return path
+
+    def _stack(self, sources, mode, workers, options):
+        stacker = Stacker(mode, **options)
+        first = None
+        for r in run(sources, _frame, workers=workers, max_in_flight=workers):
+            if r.error is not None:
+                raise r.error
+            k, black, raw = r.value
+            if first is None:
+                first = k, black
+            elif (k.model, k.iso) != (first[0].model, first[0].iso):
+                raise ValueError("{} was taken with {} at ISO {}, not {} at ISO {}".format(
+                    r.source, k.model, k.iso, first[0].model, first[0].iso))
+            stacker.add(raw)
+        if first is None:
+            raise ValueError("no frames")
+        return first[0], first[1], stacker.count, stacker.result()
+
+    def build_dark(self, sources, mode="sigma", workers=1, **options):
+        """
+        stack the dark frames in sources into a master dark and return its
+        path. The key comes from the first frame; all frames must share its
+        model and ISO.
+        """
+        k, black, n, master = self._stack(sources, mode, workers, options)
+        return self._store("dark", k, master, n, black)
+
+    def build_flat(self, sources, mode="mean", workers=1, **options):
+        """
+        stack the flat frames in sources into a gain map and return its
+        path. A matching master dark is subtracted when there is one,
+        otherwise the black level.
+        """
+        k, black, n, master = self._stack(sources, mode, workers, options)
+        dark = self._find("dark", k)
+        if dark is not None:
+            signal = master.astype(np.float32) - self._load(dark) + black
+            master = np.clip(signal, 0, None)
+        return self._store("flat", k._replace(exposure=None, temperature=None), flat_gain(master, black), n, black)
+
+    def _find(self, kind, key):
+        best = None
+        for name, entry in self.index().items():
+            if entry["kind"] != kind or entry["model"] != key.model or entry["iso"] != key.iso:
+                continue
+            if kind == "flat":
+                return name
+            if entry["exposure"] != key.exposure:
+                continue
+            if entry["temperature"] is None or key.temperature is None:
+                if entry["temperature"] is key.temperature:
+                    return name
+                continue
+            diff = abs(entry["temperature"] - key.temperature)
+            if diff <= self.temperature_tolerance and (best is None or diff < best[0]):
+                best = diff, name
+        return best and best[1]
+
+    def _load(self, name):
+        arr = self._maps.get(name)
+        if arr is None:
+            arr = self._maps[name] = np.load(os.path.join(self.directory, name), mmap_mode="r")
+        return arr
+
+    def dark(self, imgdata):
+        """
+        the memory-mapped master dark for the file opened in imgdata, or None.
+        """
+        name = self._find("dark", key(imgdata))
+        return None if name is None else self._load(name)
+
+    def flat(self, imgdata):
+        """
+        the memory-mapped flat gain map for the file opened in imgdata, or None.
+        """
+        name = self._find("flat", key(imgdata))
+        return None if name is None else self._load(name)
+
+    def correct(self, proc, rows=256):
+        """
+        correct the raw_image of the unpacked file in proc in place with the
+        matching dark and flat. Returns (dark applied, flat applied).
+        """
+        raw = proc.imgdata.rawdata.raw_image
+        if raw is None:
+            raise ValueError("not a bayer raw file")
+        dark, gain = self.dark(proc.imgdata), self.flat(proc.imgdata)
+        for m in (dark, gain):
+            if m is not None and m.shape != raw.shape:
+                raise ValueError("calibration frame of shape {} does not match {}".format(m.shape, raw.shape))
+        if dark is not None or gain is not None:
+            correct(raw, dark, gain, _levels(proc.imgdata), rows=rows)
+        return dark is not None, gain is not None
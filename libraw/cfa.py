@@ -0,0 +1,177 @@
+"""
+@package libraw.cfa
+The color filter array of a raw file as a small tile of color indices.
+
+LibRaw describes the CFA with idata.filters, a packed 8 x 2 pattern of
+color indices into idata.cdesc, or with the 6 x 6 idata.xtrans table when
+filters is 9. A Pattern decodes either into its repeating tile and gives
+per-color access to a mosaic without masks:
+
+    pattern = libraw.cfa.from_imgdata(proc.imgdata)
+    pattern.name                                  # "BGGR"
+    for color, plane in pattern.planes(proc.imgdata.rawdata.visible_image):
+        plane *= gains[color]                     # strided views, no copies
+
+    greens = pattern.channel_by_name(mosaic, "G") # both greens, colors 1 and 3
+    reds = pattern.gather(mosaic, 0)              # X-Trans: (8, h // 6, w // 6)
+
+Patterns are cached by filters value, so looking one up per frame is free.
+They describe visible_image coordinates; from_imgdata(imgdata, raw=True)
+gives the pattern of rawdata.raw_image, which includes the margins.
+"""
+
+import functools
+
+import numpy as np
+
+# idata.filters of X-Trans sensors, whose pattern is in idata.xtrans
+XTRANS = 9
+# idata.filters of Leaf backs with a 16 x 16 pattern, not supported
+LEAF = 1
+
+class Pattern:
+    """
+    a CFA tile: tile[row % rows, col % cols] is the index into cdesc of the
+    color at (row, col). Use from_filters() or from_imgdata() instead of
+    creating Patterns directly, they are cached.
+    """
+    def __init__(self, tile, cdesc="RGBG", filters=None):
+        self.tile = np.array(tile, np.uint8)
+        self.tile.flags.writeable = False
+        self.rows, self.cols = self.tile.shape
+        self.cdesc = cdesc.decode("ascii") if isinstance(cdesc, bytes) else cdesc
+        self.filters = filters
+        self.colors = tuple(int(c) for c in np.unique(self.tile))
+        # color -> (tile rows, tile columns) of its positions
+        self._positions = {c: tuple(a.astype(np.intp) for a in np.nonzero(self.tile == c)) for c in self.colors}
+
+    def __repr__(self):
+        return "Pattern({!r})".format(self.name)
+
+    @property
+    def is_bayer(self):
+        return self.tile.shape == (2, 2) and sorted(self.cdesc[c] for c in self.tile.flat) == ["B", "G", "G", "R"]
+
+    @property
+    def name(self):
+        """
+        the colors of the tile row by row, e.g. "RGGB".
+        """
+        return "".join(self.cdesc[c] for c in self.tile.flat)
+
+    def color(self, row, col):
+        return int(self.tile[row % self.rows, col % self.cols])
+
+    def shifted(self, top, left):
+        """
+        the pattern of the same CFA seen from (top, left), e.g. of a crop.
+        """
+        return _shifted(self, top % self.rows, left % self.cols)
+
+    def positions(self, color):
+        """
+        (tile rows, tile columns) of the positions of color in the tile.
+        """
+        return self._positions[color]
+
+    def planes(self, mosaic):
+        """
+        yield (color, view) for every position of the tile; each view is
+        the strided sub-image of that position, writable if mosaic is.
+        """
+        for dy in range(self.rows):
+            for dx in range(self.cols):
+                yield int(self.tile[dy, dx]), mosaic[dy::self.rows, dx::self.cols]
+
+    def channel(self, mosaic, color):
+        """
+        the strided views of all positions of the color index color. LibRaw
+        gives the second green of 3 color files index 3 (filters 0xb4b4b4b4
+        for RGGB), so channel(mosaic, 1) is only one of the greens; use
+        channel_by_name for both.
+        """
+        rows, cols = self._positions[color]
+        return [mosaic[dy::self.rows, dx::self.cols] for dy, dx in zip(rows, cols)]
+
+    def indices(self, name):
+        """
+        the color indices whose letter in cdesc is name, e.g. (1, 3) for "G".
+        """
+        return tuple(c for c in self.colors if self.cdesc[c] == name)
+
+    def channel_by_name(self, mosaic, name):
+        """
+        the strided views of all positions whose color is the letter name,
+        e.g. both greens for "G".
+        """
+        return [v for c in self.indices(name) for v in self.channel(mosaic, c)]
+
+    def _blocks(self, mosaic):
+        h = mosaic.shape[0] // self.rows
+        w = mosaic.shape[1] // self.cols
+        return mosaic[:h * self.rows, :w * self.cols].reshape(h, self.rows, w, self.cols)
+
+    def gather(self, mosaic, color):
+        """
+        the samples of color as an (n, height // rows, width // cols) array,
+        one plane per position of color in the tile. Rows and columns that
+        do not fill a whole tile are left out.
+        """
+        rows, cols = self._positions[color]
+        return self._blocks(mosaic)[:, rows, :, cols]
+
+    def scatter(self, mosaic, color, values):
+        """
+        store values, shaped like gather(mosaic, color), back into mosaic.
+        """
+        rows, cols = self._positions[color]
+        self._blocks(mosaic)[:, rows, :, cols] = values
+
+@functools.lru_cache(maxsize=64)
+def _shifted(pattern, top, left):
+    if not top and not left:
+        return pattern
+    return Pattern(np.roll(pattern.tile, (-top, -left), axis=(0, 1)), pattern.cdesc, None)
+
+def _tile(filters):
+    """
+    the 8 x 2 tile of LibRaw's FC(), reduced to 2 x 2 when it repeats.
+    """
+    tile = np.array([[(filters >> ((((row << 1) & 14) | (col & 1)) << 1)) & 3 for col in range(2)]
+                     for row in range(8)])
+    for rows in (2, 4):
+        if (tile == np.tile(tile[:rows], (8 // rows, 1))).all():
+            return tile[:rows]
+    return tile
+
+@functools.lru_cache(maxsize=64)
+def from_filters(filters, xtrans=None, cdesc="RGBG"):
+    """
+    the Pattern of a LibRaw filters value. X-Trans (filters 9) needs
+    xtrans, the 6 x 6 table as a tuple of tuples.
+    """
+    if filters == 0:
+        raise ValueError("not a CFA image (filters is 0)")
+    if filters == LEAF:
+        raise ValueError("16 x 16 Leaf patterns are not supported")
+    if filters == XTRANS:
+        if xtrans is None:
+            raise ValueError("X-Trans patterns need the xtrans table")
+        return Pattern(xtrans, cdesc, filters)
+    return Pattern(_tile(filters), cdesc, filters)
+
+def from_imgdata(imgdata, raw=False):
+    """
+    the Pattern of the opened file, for visible_image coordinates or with
+    raw for raw_image coordinates.
+    """
+    idata = imgdata.idata
+    cdesc = idata.cdesc.decode("ascii") or "RGBG"
+    if idata.filters == XTRANS:
+        table = idata.xtrans_abs if raw else idata.xtrans
+        return from_filters(XTRANS, tuple(tuple(row.raw) for row in table), cdesc)
+    pattern = from_filters(idata.filters, None, cdesc)
+    if raw:
+        # visible (0, 0) is raw (top_margin, left_margin)
+        pattern = pattern.shifted(-imgdata.sizes.top_margin, -imgdata.sizes.left_margin)
+    return pattern
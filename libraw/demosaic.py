@@ -0,0 +1,179 @@
+"""
+@package libraw.demosaic
+Full resolution demosaic of 2x2 bayer mosaics in NumPy.
+
+    Bilinear        averages of the nearest samples of each color
+    MalvarHeCutler  bilinear plus a gradient correction from the center
+                    sample (Malvar, He, Cutler, "High-quality linear
+                    interpolation for demosaicing of Bayer-patterned color
+                    images", ICASSP 2004)
+
+Both kernels are split into 1D neighbour sums of the whole mosaic,
+horizontal and vertical pairs at distance 1 and 2 and the diagonal sum
+(the vertical pair of the horizontal pair), and every CFA position then
+combines these sums on its strided plane view. The result is camera RGB
+in raw units, before white balance and color conversion, as float32 or
+uint16:
+
+    develop = MalvarHeCutler(cfa.from_imgdata(proc.imgdata))
+    rgb = develop(proc.imgdata.rawdata.visible_image)
+
+    rgb = demosaic(mosaic, pattern, "mhc", out=buf, workers=4)
+
+demosaic() works through row bands with the halo of libraw.stream, so the
+scratch memory is proportional to the band, and can run the bands on a
+thread pool (NumPy releases the GIL for the array arithmetic). The
+instances also plug into libraw.stream.develop_strips.
+"""
+
+import concurrent.futures
+import os
+
+import numpy as np
+
+from libraw import cfa
+from libraw.stream import strip_bounds
+
+class Bilinear:
+    """
+    bilinear demosaic for the bayer pattern (a libraw.cfa.Pattern or a
+    LibRaw filters value) into a (height, width, 3) array of dtype.
+    """
+    # mosaic rows needed on each side of a strip, see libraw.stream
+    halo = 1
+    shrink = 1
+
+    def __init__(self, pattern, dtype=np.float32):
+        if not isinstance(pattern, cfa.Pattern):
+            pattern = cfa.from_filters(pattern)
+        if not pattern.is_bayer:
+            raise ValueError("only 2x2 bayer patterns are supported, got {}".format(pattern.name))
+        self.pattern = pattern
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.uint16):
+            raise ValueError("dtype must be float32 or uint16")
+        rgb = {"R": 0, "G": 1, "B": 2}
+        # per 2x2 position: (dy, dx, channel of the sample, channel found in the same row, in the same column)
+        self._positions = []
+        for dy in range(2):
+            for dx in range(2):
+                own = rgb[pattern.cdesc[pattern.tile[dy, dx]]]
+                row = rgb[pattern.cdesc[pattern.tile[dy, 1 - dx]]]
+                col = rgb[pattern.cdesc[pattern.tile[1 - dy, dx]]]
+                self._positions.append((dy, dx, own, row, col))
+
+    def _sums(self, mosaic):
+        """
+        the neighbour sums of mosaic as float32 arrays of its shape.
+        """
+        h, w = mosaic.shape
+        r = self.halo
+        p = np.pad(mosaic.astype(np.float32), r, mode="reflect")
+        h1 = p[:, r - 1:r - 1 + w] + p[:, r + 1:r + 1 + w]   # padded rows, for d
+        sums = {
+            "m": p[r:r + h, r:r + w],
+            "h1": h1[r:r + h],
+            "v1": p[r - 1:r - 1 + h, r:r + w] + p[r + 1:r + 1 + h, r:r + w],
+            "d": h1[r - 1:r - 1 + h] + h1[r + 1:r + 1 + h],
+        }
+        if r >= 2:
+            sums["h2"] = p[r:r + h, r - 2:r - 2 + w] + p[r:r + h, r + 2:r + 2 + w]
+            sums["v2"] = p[r - 2:r - 2 + h, r:r + w] + p[r + 2:r + 2 + h, r:r + w]
+        return sums
+
+    # interpolation at one CFA position from the neighbour sums s (plane views)
+    def _green(self, s):
+        return (s["h1"] + s["v1"]) * 0.25
+
+    def _same_row(self, s):
+        return s["h1"] * 0.5
+
+    def _same_col(self, s):
+        return s["v1"] * 0.5
+
+    def _diagonal(self, s):
+        return s["d"] * 0.25
+
+    def __call__(self, mosaic, out=None):
+        """
+        demosaic mosaic into out, a (height, width, 3) array of self.dtype.
+        """
+        h, w = mosaic.shape
+        if out is None:
+            out = np.empty((h, w, 3), self.dtype)
+        elif out.shape != (h, w, 3) or out.dtype != self.dtype:
+            raise ValueError("out must be a ({}, {}, 3) {} array".format(h, w, self.dtype))
+        sums = self._sums(mosaic)
+        for dy, dx, own, row, col in self._positions:
+            s = {k: v[dy::2, dx::2] for k, v in sums.items()}
+            o = out[dy::2, dx::2]
+            self._store(o[..., own], s["m"])
+            if own == 1:
+                self._store(o[..., row], self._same_row(s))
+                self._store(o[..., col], self._same_col(s))
+            else:
+                self._store(o[..., 1], self._green(s))
+                self._store(o[..., 2 - own], self._diagonal(s))
+        return out
+
+    def _store(self, dst, values):
+        if self.dtype == np.uint16:
+            values = np.clip(values, 0, 0xFFFF)
+            np.rint(values, out=values)
+        np.copyto(dst, values, casting="unsafe")
+
+class MalvarHeCutler(Bilinear):
+    """
+    Malvar-He-Cutler demosaic; the 5x5 kernels of the paper written as
+    sums of the 1D neighbour sums.
+    """
+    halo = 2
+
+    def _green(self, s):
+        return (4 * s["m"] + 2 * (s["h1"] + s["v1"]) - (s["h2"] + s["v2"])) * 0.125
+
+    def _same_row(self, s):
+        return (5 * s["m"] + 4 * s["h1"] - s["h2"] - s["d"] + 0.5 * s["v2"]) * 0.125
+
+    def _same_col(self, s):
+        return (5 * s["m"] + 4 * s["v1"] - s["v2"] - s["d"] + 0.5 * s["h2"]) * 0.125
+
+    def _diagonal(self, s):
+        return (6 * s["m"] + 2 * s["d"] - 1.5 * (s["h2"] + s["v2"])) * 0.125
+
+METHODS = {
+    "bilinear": Bilinear,
+    "mhc": MalvarHeCutler,
+}
+
+def demosaic(mosaic, pattern, method="mhc", dtype=np.float32, out=None, rows=256, workers=1):
+    """
+    demosaic mosaic with METHODS[method] in bands of rows rows and return
+    the (height, width, 3) image of dtype, in out if given. With workers > 1
+    (None: one per CPU) the bands run on a thread pool.
+    """
+    engine = METHODS[method](pattern, dtype)
+    h, w = mosaic.shape
+    if out is None:
+        out = np.empty((h, w, 3), engine.dtype)
+    elif out.shape != (h, w, 3) or out.dtype != engine.dtype:
+        raise ValueError("out must be a ({}, {}, 3) {} array".format(h, w, engine.dtype))
+
+    def band(bounds):
+        start, stop, in_start, in_stop = bounds
+        if (in_start, in_stop) == (0, h):
+            engine(mosaic, out)
+            return
+        result = engine(mosaic[in_start:in_stop])
+        out[start:stop] = result[start - in_start:stop - in_start]
+
+    bands = list(strip_bounds(h, rows, engine.halo))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(bands) == 1:
+        for b in bands:
+            band(b)
+    else:
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            for f in [executor.submit(band, b) for b in bands]:
+                f.result()
+    return out
@@ -0,0 +1,176 @@
+"""
+@package libraw.index
+A SQLite catalogue of raw file metadata.
+
+Files are opened without unpacking on a thread pool (see libraw.batch), the
+chosen imgdata fields are read in one go and written with batched inserts.
+Each row is keyed by path and remembers mtime and size, so updating the
+index only opens new or changed files:
+
+    with Index("catalogue.db") as index:
+        index.update(["/data/raws"])
+        rows = index.find(idata_model="RP_imx477", other_iso_speed=3200)
+
+Column names are the field paths with "." replaced by "_".
+"""
+
+import json
+import os
+import sqlite3
+
+from libraw.batch import find_files, run
+
+# imgdata fields stored by default
+FIELDS = (
+    "idata.make",
+    "idata.model",
+    "idata.raw_count",
+    "idata.dng_version",
+    "idata.colors",
+    "idata.filters",
+    "idata.cdesc",
+    "sizes.raw_width",
+    "sizes.raw_height",
+    "sizes.width",
+    "sizes.height",
+    "sizes.flip",
+    "other.iso_speed",
+    "other.shutter",
+    "other.aperture",
+    "other.focal_len",
+    "other.timestamp",
+    "other.shot_order",
+    "other.artist",
+    "lens.Lens",
+    "lens.LensMake",
+    "lens.FocalLengthIn35mmFormat",
+    "shootinginfo.BodySerial",
+    "makernotes.common.real_ISO",
+    "makernotes.common.SensorTemperature",
+)
+
+def column(field):
+    return field.replace(".", "_")
+
+def _value(v):
+    """
+    convert a ctypes field value into something SQLite can store.
+    """
+    if isinstance(v, bytes):
+        return v.split(b"\0", 1)[0].decode("utf-8", "replace")
+    if hasattr(v, "_length_"):  # ctypes array
+        return json.dumps([_value(x) for x in v])
+    return v
+
+def extract(imgdata, fields=FIELDS):
+    """
+    read fields (dotted paths below imgdata) into a tuple.
+    """
+    values = []
+    for field in fields:
+        v = imgdata
+        for name in field.split("."):
+            v = getattr(v, name)
+        values.append(_value(v))
+    return tuple(values)
+
+class Index:
+    """
+    the catalogue in the SQLite database at path.
+    If the database was built with different fields it is rebuilt.
+    """
+    def __init__(self, path, fields=FIELDS):
+        self.fields = tuple(fields)
+        self.columns = [column(f) for f in self.fields]
+        self.db = sqlite3.connect(path)
+        self._create()
+
+    def _create(self):
+        existing = [row[1] for row in self.db.execute("PRAGMA table_info(images)")]
+        wanted = ["path", "mtime", "size", "error"] + self.columns
+        if existing and existing != wanted:
+            self.db.execute("DROP TABLE images")
+        self.db.execute("CREATE TABLE IF NOT EXISTS images (path TEXT PRIMARY KEY, mtime REAL, size INTEGER, error TEXT, {})"
+                        .format(", ".join(self.columns)))
+        for col in ("idata_model", "other_iso_speed", "other_timestamp"):
+            if col in self.columns:
+                self.db.execute("CREATE INDEX IF NOT EXISTS images_{0} ON images ({0})".format(col))
+        self.db.commit()
+
+    def stale(self, paths):
+        """
+        the files below paths that are not in the index or changed since.
+        Returns a list of (path, mtime, size).
+        """
+        known = {p: (m, s) for p, m, s in self.db.execute("SELECT path, mtime, size FROM images")}
+        out = []
+        for path in find_files(paths):
+            path = os.path.abspath(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if known.get(path) != (st.st_mtime, st.st_size):
+                out.append((path, st.st_mtime, st.st_size))
+        return out
+
+    def update(self, paths, workers=None, batch_size=256, prune=False):
+        """
+        index new and changed files below paths and return how many were read.
+        Files LibRaw cannot open are stored with their error message so they
+        are not retried until they change. With prune, rows of files that no
+        longer exist are removed.
+        """
+        todo = self.stale(paths)
+        stats = {path: (mtime, size) for path, mtime, size in todo}
+        sql = "INSERT OR REPLACE INTO images VALUES ({})".format(", ".join("?" * (4 + len(self.columns))))
+        empty = (None,) * len(self.columns)
+
+        rows = []
+        fields = self.fields
+        for r in run((p for p, _, _ in todo), lambda proc: extract(proc.imgdata, fields), workers=workers, ordered=False):
+            mtime, size = stats[r.source]
+            if r.error is None:
+                rows.append((r.source, mtime, size, None) + r.value)
+            else:
+                rows.append((r.source, mtime, size, str(r.error)) + empty)
+            if len(rows) >= batch_size:
+                with self.db:
+                    self.db.executemany(sql, rows)
+                rows = []
+        if rows:
+            with self.db:
+                self.db.executemany(sql, rows)
+
+        if prune:
+            gone = [(p,) for p, in self.db.execute("SELECT path FROM images") if not os.path.exists(p)]
+            with self.db:
+                self.db.executemany("DELETE FROM images WHERE path = ?", gone)
+        return len(todo)
+
+    def query(self, where="1", params=()):
+        """
+        rows matching an SQL where clause, as dicts.
+        """
+        cur = self.db.execute("SELECT * FROM images WHERE " + where, params)
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, row)) for row in cur]
+
+    def find(self, **equal):
+        """
+        rows whose columns equal the given values, e.g. find(other_iso_speed=3200).
+        """
+        for name in equal:
+            if name not in self.columns and name not in ("path", "mtime", "size", "error"):
+                raise KeyError(name)
+        where = " AND ".join("{} = ?".format(name) for name in equal) or "1"
+        return self.query(where, tuple(equal.values()))
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
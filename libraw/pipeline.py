@@ -0,0 +1,174 @@
+"""
+@package libraw.pipeline
+The development steps of example.py (linearization, black subtraction,
+white balance, half-size demosaic, color matrix and gamma) folded into a
+few passes over the mosaic.
+
+Everything that only depends on a raw value and its CFA position is
+combined into one 64K-entry lookup table per position; the integer color
+matrix, clipping and gamma are combined into a second table indexed by the
+matrix product. Buffers are allocated once per image size and thread and
+reused, so one Pipeline can serve several threads.
+
+    proc.unpack()
+    develop = Pipeline.from_imgdata(proc.imgdata)
+    rgb = develop(proc.imgdata.rawdata.visible_image)
+
+from_imgdata takes the black level from LibRaw, color.black plus the per
+channel cblack, while example.py uses the darkest raw value and ignores
+cblack. Given the same black level the result equals example.py's
+listings, except that values below it clip to 0 instead of wrapping around
+in uint16:
+
+    Pipeline.from_imgdata(proc.imgdata, black=int(mosaic.min()), cblack=None)
+"""
+
+import threading
+
+import numpy as np
+
+from libraw import cfa, snapshot
+
+UINT14_MAX = 2**14 - 1
+
+class Pipeline:
+    """
+    a reusable development pipeline for bayer mosaics of one camera setup.
+
+    curve: linearization LUT (65536 entries) or None for identity
+    black, cblack: black level and LibRaw's per channel cblack array
+    maximum: saturation level
+    cam_mul: white balance multipliers (R, G, B, G2)
+    rgb_cam: 3x4 camera to sRGB matrix
+    filters: LibRaw CFA description of the mosaic passed to __call__
+    """
+    # every output pixel depends on one 2x2 block only, see libraw.stream
+    halo = 0
+    shrink = 2
+
+    def __init__(self, filters, maximum, cam_mul, rgb_cam, black=0, cblack=None, curve=None, gamma=2.2):
+        pattern = cfa.from_filters(filters)
+        if not pattern.is_bayer:
+            raise ValueError("only 2x2 bayer patterns are supported, got filters 0x{:x}".format(filters))
+        colors = [int(c) for c in pattern.tile.flat]
+        greens = [i for i, c in enumerate(colors) if c in (1, 3)]
+        self.filters = filters
+        # flat 2x2 positions of R, G1, G2, B
+        self.red = colors.index(0)
+        self.green = greens
+        self.blue = colors.index(2)
+
+        raw = np.arange(0x10000)
+        lin = raw if curve is None else np.asarray(curve, np.int64)[raw]
+
+        # Listing 1: black subtraction and scaling to 14 bit (integer factor)
+        if cblack is None:
+            cblack = np.zeros(6, np.uint32)
+        cblack = np.asarray(cblack)
+        scale = int(UINT14_MAX / (maximum - black))
+
+        # Listing 2: white balance relative to green (float32 like cam_mul)
+        cam_mul = np.asarray(cam_mul, np.float32)
+        mul = cam_mul / cam_mul[1]
+        self.cam_mul = mul
+
+        luts = []
+        for pos, c in enumerate(colors):
+            row, col = divmod(pos, 2)
+            b = black + int(cblack[c])
+            if cblack[4] and cblack[5]:
+                b += int(cblack[6 + (row % cblack[4]) * cblack[5] + col % cblack[5]])
+            v = np.clip((lin - b) * scale, 0, UINT14_MAX)
+            if c in (0, 2):
+                v = np.minimum(np.floor(v.astype(np.float32) * mul[c]), UINT14_MAX)
+                # Listing 3/4: *4 to 16 bit, then // 2**8
+                lut = (v.astype(np.int64) * 4 // 256).astype(np.uint16)
+            else:
+                # greens are averaged first: (4*g1 // 2 + 4*g2 // 2) // 256 == (g1 + g2) // 128
+                lut = v.astype(np.uint16)
+            luts.append(lut)
+        self._luts = luts
+
+        # Listing 4: integer color matrix, // 255 and clip; Listing 5: gamma
+        m = np.round(np.asarray(rgb_cam, np.float32)[:, 0:3] * 255).astype(np.int16).astype(np.int32)
+        self.matrix = m
+        lo = int(np.minimum(m, 0).sum(axis=1).min()) * 255
+        hi = int(np.maximum(m, 0).sum(axis=1).max()) * 255
+        gcurve = np.array([(i / 255) ** (1 / gamma) * 255 for i in range(256)], dtype=np.uint8)
+        acc = np.arange(lo, hi + 1)
+        self._offset = lo
+        self._out_lut = gcurve[np.clip(acc // 255, 0, 255)]
+
+        self._local = threading.local()  # scratch buffers of each thread
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @classmethod
+    def from_imgdata(cls, imgdata, **kwargs):
+        """
+        build a pipeline from LibRaw's imgdata (after open_file/unpack).
+        kwargs override the values taken from imgdata.
+        """
+        return cls.from_calibration(snapshot(imgdata), **kwargs)
+
+    @classmethod
+    def from_calibration(cls, cal, **kwargs):
+        """
+        build a pipeline from a libraw.ColorCalibration, e.g. in a worker process.
+        kwargs override the values taken from cal.
+        """
+        options = dict(black=cal.black, cblack=cal.cblack, curve=cal.curve)
+        options.update(kwargs)
+        return cls(cal.filters, cal.maximum, cal.cam_mul, cal.rgb_cam, **options)
+
+    def _get_buffers(self, h, w):
+        buffers = getattr(self._local, "buffers", {})
+        bufs = buffers.get((h, w))
+        if bufs is None:
+            bufs = (np.empty((h, w), np.int32), np.empty((h, w), np.int32),
+                    np.empty((h, w), np.uint16), np.empty((h, w), np.uint16), np.empty((h, w), np.uint16))
+            self._local.buffers = {(h, w): bufs}  # keep only the latest size
+        return bufs
+
+    def __call__(self, mosaic, out=None, inplace=False):
+        """
+        develop mosaic into a (height // 2, width // 2, 3) uint8 sRGB image.
+        With inplace the mosaic itself is used as scratch space and overwritten.
+        """
+        h, w = mosaic.shape[0] // 2, mosaic.shape[1] // 2
+        mosaic = mosaic[:2 * h, :2 * w]
+        planes = [mosaic[r::2, c::2] for r in range(2) for c in range(2)]
+        acc, tmp, rbuf, gbuf, bbuf = self._get_buffers(h, w)
+        if inplace:
+            rbuf, gbuf, bbuf = planes[self.red], planes[self.green[0]], planes[self.blue]
+            g2 = planes[self.green[1]]
+        else:
+            g2 = tmp.view(np.uint16)[:, :w]  # reuse half of tmp until the matrix step
+
+        # one gather per CFA position does listings 1 to 3
+        np.take(self._luts[self.red], planes[self.red], out=rbuf, mode="clip")
+        np.take(self._luts[self.blue], planes[self.blue], out=bbuf, mode="clip")
+        np.take(self._luts[self.green[0]], planes[self.green[0]], out=gbuf, mode="clip")
+        np.take(self._luts[self.green[1]], planes[self.green[1]], out=g2, mode="clip")
+        np.add(gbuf, g2, out=gbuf)
+        gbuf >>= 7
+
+        if out is None:
+            out = np.empty((h, w, 3), np.uint8)
+        for c in range(3):
+            m = self.matrix[c]
+            np.multiply(rbuf, m[0], out=acc, dtype=np.int32)
+            np.multiply(gbuf, m[1], out=tmp, dtype=np.int32)
+            acc += tmp
+            np.multiply(bbuf, m[2], out=tmp, dtype=np.int32)
+            acc += tmp
+            acc -= self._offset
+            np.take(self._out_lut, acc, out=out[:, :, c], mode="clip")
+        return out
@@ -0,0 +1,96 @@
+"""
+@package libraw.preview
+Previews for contact sheets and galleries without developing the raw data.
+
+The embedded thumbnail is used when there is a usable one: a JPEG is
+returned as bytes without decoding, a bitmap thumbnail as an array. Only
+files without one are rendered from the raw data, at half size.
+
+    with LibRaw() as proc:
+        proc.open_file(path)
+        p = preview(proc)
+        if p.kind == "jpeg": ...
+
+    save_previews(["/data/raws"], "/data/thumbs", workers=4)
+"""
+
+import collections
+import os
+
+from libraw import LIBRAW_THUMBNAIL_JPEG, LIBRAW_THUMBNAIL_BITMAP, LIBRAW_THUMBNAIL_BITMAP16, writers
+from libraw.batch import find_files, run
+
+Preview = collections.namedtuple("Preview", "kind data width height")
+Preview.__doc__ = """kind is "jpeg" (data: memoryview or bytes with the JPEG file),
+"bitmap" (embedded bitmap thumbnail) or "render" (half size render); the
+latter two have a (height, width, colors) array as data."""
+
+def preview(proc, min_size=0, render=True):
+    """
+    the preview of the file opened in proc.
+
+    Thumbnails whose longer side is below min_size are ignored. The "jpeg"
+    and "bitmap" data point into the handle and are only valid until it is
+    recycled. Without a usable thumbnail the raw data is rendered at half
+    size, or None is returned if render is False.
+    """
+    thumb = proc.imgdata.thumbnail
+    try:
+        proc.unpack_thumb()
+    except Exception:
+        pass
+    else:
+        if max(thumb.twidth, thumb.theight) >= min_size:
+            if thumb.tformat == LIBRAW_THUMBNAIL_JPEG:
+                return Preview("jpeg", thumb.thumb, thumb.twidth, thumb.theight)
+            if thumb.tformat in (LIBRAW_THUMBNAIL_BITMAP, LIBRAW_THUMBNAIL_BITMAP16):
+                return Preview("bitmap", thumb.bitmap, thumb.twidth, thumb.theight)
+    if not render:
+        return None
+
+    params = proc.imgdata.params
+    half_size = params.half_size
+    params.half_size = 1
+    try:
+        proc.unpack()
+        proc.dcraw_process()
+        img = proc.dcraw_make_mem_image()
+    finally:
+        params.half_size = half_size
+    return Preview("render", img, img.shape[1], img.shape[0])
+
+def _copy(p):
+    """
+    detach a Preview from its handle.
+    """
+    if p is None or p.kind == "render":
+        return p
+    data = bytes(p.data) if p.kind == "jpeg" else p.data.copy()
+    return p._replace(data=data)
+
+def previews(sources, min_size=0, render=True, workers=None, ordered=True):
+    """
+    yield a libraw.batch.Result with a detached Preview for every path or
+    buffer in sources (directories are searched for raw files).
+    """
+    return run(find_files(sources), lambda proc: _copy(preview(proc, min_size, render)), workers=workers, ordered=ordered)
+
+def save_previews(paths, outdir, min_size=0, render=True, workers=None):
+    """
+    write the preview of every raw file below paths into outdir, as .jpg
+    when the camera embedded a JPEG and as .ppm otherwise.
+    Returns the list of files that failed.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    failed = []
+    for r in previews(paths, min_size, render, workers, ordered=False):
+        if r.error is not None or r.value is None:
+            failed.append(r.source)
+            continue
+        stem = os.path.join(outdir, os.path.splitext(os.path.basename(r.source))[0])
+        if r.value.kind == "jpeg":
+            with open(stem + ".jpg", "wb") as f:
+                f.write(r.value.data)
+        else:
+            writers.write_ppm(stem + ".ppm", r.value.data)
+    return failed
@@ -0,0 +1,205 @@
+"""
+@package libraw.progress
+Per-stage timing of LibRaw through its progress callback.
+
+LibRaw reports every processing stage (identify, load_raw, scale_colors,
+interpolate, highlights, convert_rgb, ...) to the progress handler. A
+Profiler installed on a handle timestamps these calls and turns them into
+seconds per stage; Metrics collects the stage times of many files into
+histograms that can be exported as a dict or in the Prometheus text format:
+
+    metrics = Metrics()
+    with LibRaw() as proc:
+        profiler = Profiler().attach(proc)
+        proc.open_file(path)
+        proc.unpack()
+        proc.dcraw_process()
+        metrics.add(profiler.stages())
+
+    for r in libraw.batch.run(paths, profiled(develop, metrics)):
+        ...
+    print(metrics.prometheus())
+
+A Profiler can also stop processing: its cancel function is asked at every
+stage, and cancel() requests it from another thread. The interrupted LibRaw
+call then raises.
+"""
+
+import bisect
+import collections
+import threading
+import time
+
+# LibRaw_progress flags -> stage names
+STAGES = collections.OrderedDict([
+    (1 << 0, "open"),
+    (1 << 1, "identify"),
+    (1 << 2, "size_adjust"),
+    (1 << 3, "load_raw"),
+    (1 << 4, "raw2image"),
+    (1 << 5, "remove_zeroes"),
+    (1 << 6, "bad_pixels"),
+    (1 << 7, "dark_frame"),
+    (1 << 8, "foveon_interpolate"),
+    (1 << 9, "scale_colors"),
+    (1 << 10, "pre_interpolate"),
+    (1 << 11, "interpolate"),
+    (1 << 12, "mix_green"),
+    (1 << 13, "median_filter"),
+    (1 << 14, "highlights"),
+    (1 << 15, "fuji_rotate"),
+    (1 << 16, "flip"),
+    (1 << 17, "apply_profile"),
+    (1 << 18, "convert_rgb"),
+    (1 << 19, "stretch"),
+    (1 << 28, "thumb_load"),
+])
+
+# histogram bucket bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def stage_name(flag):
+    return STAGES.get(flag) or "stage_{}".format(flag.bit_length() - 1)
+
+class Profiler:
+    """
+    records the progress calls of the handles it is attached to.
+
+    cancel(stage, iteration, expected), if given, is called with the stage
+    name at every progress call; returning a true value cancels processing.
+    """
+    def __init__(self, cancel=None):
+        self.events = []
+        self._cancel = cancel
+        self._cancelled = False
+
+    def attach(self, proc):
+        """
+        install this profiler as the progress handler of proc and return it.
+        """
+        proc.set_progress_handler(self)
+        return self
+
+    @staticmethod
+    def detach(proc):
+        proc.set_progress_handler(None)
+
+    def __call__(self, stage, iteration, expected):
+        self.events.append((time.perf_counter(), stage, iteration, expected))
+        if not self._cancelled and self._cancel is not None and self._cancel(stage_name(stage), iteration, expected):
+            self._cancelled = True
+        return self._cancelled
+
+    def cancel(self):
+        """
+        make the next progress call cancel processing. Safe to call from
+        any thread; reset() clears it. Also set when the cancel function
+        returned true.
+        """
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def reset(self):
+        """
+        forget the recorded calls, e.g. before the next file.
+        """
+        self.events = []
+        self._cancelled = False
+
+    def stages(self):
+        """
+        seconds spent in each stage since the last reset, in the order the
+        stages ran. The time after a progress call is counted to its stage
+        until the next call, unless the call reported the last iteration.
+        """
+        times = collections.OrderedDict()
+        events = self.events
+        for i, (t, stage, iteration, expected) in enumerate(events):
+            name = stage_name(stage)
+            times.setdefault(name, 0.0)
+            if i + 1 < len(events) and iteration < expected - 1:
+                times[name] += events[i + 1][0] - t
+        return times
+
+class Metrics:
+    """
+    histograms of stage times over many files. add() may be called from
+    several threads.
+    """
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = {}  # stage -> list of bucket counts, the last one +Inf
+        self._sums = collections.Counter()
+        self.files = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    def add(self, stages, cancelled=False):
+        """
+        add the stage times of one file, a dict as returned by Profiler.stages().
+        """
+        with self._lock:
+            self.files += 1
+            self.cancelled += bool(cancelled)
+            for name, seconds in stages.items():
+                counts = self._counts.get(name)
+                if counts is None:
+                    counts = self._counts[name] = [0] * (len(self.buckets) + 1)
+                counts[bisect.bisect_left(self.buckets, seconds)] += 1
+                self._sums[name] += seconds
+
+    def as_dict(self):
+        """
+        {"files": n, "cancelled": n, "stages": {stage: {"count", "sum", "mean", "buckets"}}},
+        with cumulative bucket counts keyed by upper bound.
+        """
+        with self._lock:
+            stages = {}
+            for name, counts in self._counts.items():
+                n = sum(counts)
+                cumulative = 0
+                buckets = collections.OrderedDict()
+                for bound, c in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += c
+                    buckets[bound] = cumulative
+                stages[name] = {"count": n, "sum": self._sums[name], "mean": self._sums[name] / n, "buckets": buckets}
+            return {"files": self.files, "cancelled": self.cancelled, "stages": stages}
+
+    def prometheus(self, name="libraw_stage_seconds"):
+        """
+        the histograms in the Prometheus text exposition format.
+        """
+        d = self.as_dict()
+        lines = [
+            "# HELP {} Time spent in LibRaw processing stages.".format(name),
+            "# TYPE {} histogram".format(name),
+        ]
+        for stage, h in d["stages"].items():
+            for bound, count in h["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append('{}_bucket{{stage="{}",le="{}"}} {}'.format(name, stage, le, count))
+            lines.append('{}_sum{{stage="{}"}} {!r}'.format(name, stage, h["sum"]))
+            lines.append('{}_count{{stage="{}"}} {}'.format(name, stage, h["count"]))
+        for counter, help in (("files", "Files profiled."), ("cancelled", "Files whose processing was cancelled.")):
+            lines.append("# HELP libraw_{}_total {}".format(counter, help))
+            lines.append("# TYPE libraw_{}_total counter".format(counter))
+            lines.append("libraw_{}_total {}".format(counter, d[counter]))
+        return "\n".join(lines) + "\n"
+
+def profiled(func, metrics, cancel=None):
+    """
+    wrap func(proc), e.g. for libraw.batch.run, so the stages it runs are
+    added to metrics. Stages of open_file, which batch runs before func,
+    are not included.
+    """
+    def run(proc):
+        profiler = Profiler(cancel).attach(proc)
+        try:
+            return func(proc)
+        finally:
+            Profiler.detach(proc)
+            metrics.add(profiler.stages(), profiler.cancelled)
+    return run
@@ -0,0 +1,178 @@
+"""
+@package libraw.stack
+Stack bursts of raw frames in the mosaic domain with constant memory.
+
+Frames are added one at a time to running accumulators, so memory does
+not grow with the number of frames:
+
+    mean     sum in one uint32 (or float32) buffer
+    sigma    sigma-clipped mean: running mean and variance (Welford) of
+             all frames, and the sum and count of the samples within
+             sigma standard deviations of the running mean
+    median   median of every block of frames, averaged over the blocks;
+             holds one block of frames
+
+The stacked mosaic has the layout of rawdata.raw_image, so it can be
+developed by LibRaw in place of a frame of the burst:
+
+    mosaic = stack(paths, "sigma", workers=2)
+    with LibRaw() as proc:
+        proc.open_file(paths[0])
+        proc.unpack()
+        inject(proc, mosaic)
+        proc.dcraw_process()
+        rgb = proc.dcraw_make_mem_image()
+"""
+
+import numpy as np
+
+from libraw.batch import run
+
+MODES = ("mean", "sigma", "median")
+
+class Stacker:
+    """
+    accumulates (height, width) uint16 mosaics of the same shape.
+
+    sigma and warmup (frames always accepted before clipping starts) apply
+    to "sigma", block to "median". accumulator is np.uint32 (exact) or
+    np.float32 for "mean".
+    """
+    def __init__(self, mode="mean", sigma=3.0, warmup=3, block=8, accumulator=np.uint32):
+        if mode not in MODES:
+            raise ValueError("mode must be one of {}".format(", ".join(MODES)))
+        self.mode = mode
+        self.sigma = sigma
+        self.warmup = max(warmup, 2)
+        self.block = block
+        self.accumulator = accumulator
+        self.count = 0
+        self.shape = None
+
+    def _allocate(self, shape):
+        self.shape = shape
+        f = np.float32
+        if self.mode == "mean":
+            self._sum = np.zeros(shape, self.accumulator)
+        elif self.mode == "sigma":
+            self._mean = np.zeros(shape, f)
+            self._m2 = np.zeros(shape, f)
+            self._csum = np.zeros(shape, f)
+            self._ccount = np.zeros(shape, np.uint16)
+            self._x = np.empty(shape, f)
+            self._t = np.empty(shape, f)
+            self._keep = np.empty(shape, bool)
+        else:
+            self._frames = np.empty((self.block,) + shape, np.uint16)
+            self._filled = 0
+            self._sum = np.zeros(shape, f)
+            self._weight = 0
+            self._median = np.empty(shape, f)
+
+    def add(self, mosaic):
+        """
+        add one frame. Only its values are read; it may be reused afterwards.
+        """
+        if self.shape is None:
+            self._allocate(mosaic.shape)
+        elif mosaic.shape != self.shape:
+            raise ValueError("frame shape {} does not match {}".format(mosaic.shape, self.shape))
+        self.count += 1
+        if self.mode == "mean":
+            np.add(self._sum, mosaic, out=self._sum, casting="unsafe")
+        elif self.mode == "sigma":
+            self._add_sigma(mosaic)
+        else:
+            self._frames[self._filled] = mosaic
+            self._filled += 1
+            if self._filled == self.block:
+                self._flush()
+
+    def _add_sigma(self, mosaic):
+        x, t, keep, n = self._x, self._t, self._keep, self.count
+        np.copyto(x, mosaic, casting="unsafe")
+        if n > self.warmup:
+            # keep |x - mean| <= sigma * std, compared squared to skip the sqrt
+            np.subtract(x, self._mean, out=t)
+            np.square(t, out=t)
+            np.less_equal(t, self._m2 * (self.sigma ** 2 / (n - 2)), out=keep)
+            np.multiply(x, keep, out=t)
+            self._csum += t
+            self._ccount += keep
+        else:
+            self._csum += x
+            self._ccount += 1
+        # Welford update of the running mean and sum of squared deviations
+        np.subtract(x, self._mean, out=t)
+        self._mean += t / n
+        np.subtract(x, self._mean, out=x)
+        t *= x
+        self._m2 += t
+
+    def _flush(self):
+        if self._filled:
+            np.median(self._frames[:self._filled], axis=0, out=self._median)
+            self._median *= self._filled
+            self._sum += self._median
+            self._weight += self._filled
+            self._filled = 0
+
+    def result(self, out=None):
+        """
+        the stacked mosaic as uint16, rounded, in out if given.
+        """
+        if not self.count:
+            raise ValueError("no frames added")
+        if out is None:
+            out = np.empty(self.shape, np.uint16)
+        if self.mode == "mean":
+            stacked = self._sum / np.float32(self.count)
+        elif self.mode == "sigma":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                stacked = self._csum / self._ccount
+            np.copyto(stacked, self._mean, where=self._ccount == 0)
+        else:
+            self._flush()
+            stacked = self._sum / np.float32(self._weight)
+        np.rint(stacked, out=stacked)
+        np.clip(stacked, 0, 0xFFFF, out=stacked)
+        np.copyto(out, stacked, casting="unsafe")
+        return out
+
+def _raw_copy(proc):
+    proc.unpack()
+    raw = proc.imgdata.rawdata.raw_image
+    if raw is None:
+        raise ValueError("not a bayer raw file")
+    return raw.copy()
+
+def frames(sources, params=None, workers=1):
+    """
+    yield the raw_image of every path or buffer in sources as a copy.
+    Decoding runs ahead on at most workers handles.
+    """
+    for r in run(sources, _raw_copy, params, workers=workers, max_in_flight=workers):
+        if r.error is not None:
+            raise r.error
+        yield r.value
+
+def stack(sources, mode="mean", params=None, workers=1, out=None, **options):
+    """
+    stack the raw files in sources and return the uint16 mosaic.
+    options are passed to Stacker.
+    """
+    stacker = Stacker(mode, **options)
+    for mosaic in frames(sources, params, workers):
+        stacker.add(mosaic)
+    return stacker.result(out)
+
+def inject(proc, mosaic):
+    """
+    replace the raw data of the unpacked file in proc with mosaic, so that
+    dcraw_process develops the stack with that file's metadata.
+    """
+    raw = proc.imgdata.rawdata.raw_image
+    if raw is None or raw.shape != mosaic.shape:
+        raise ValueError("mosaic does not match the raw data of the open file")
+    np.copyto(raw, mosaic, casting="unsafe")
+    return proc
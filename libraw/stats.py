@@ -0,0 +1,122 @@
+"""
+@package libraw.stats
+Per-channel histograms and exposure statistics of the raw mosaic, for
+auto-exposure loops and clipping checks without developing the image.
+
+    proc.unpack()
+    e = libraw.stats.from_imgdata(proc.imgdata, stride=4)
+    e.channels["G"].mean, e.saturated, e.ev
+
+Samples are read through the strided CFA views of libraw.cfa, optionally
+taking every stride-th sample of each channel (the CFA phase is kept), and
+counted with np.bincount; means, percentiles and clipping all come from
+the histogram. With stride 4 a 12 MP frame takes a few milliseconds.
+
+For frames decoded with libraw.brcm:
+
+    raw = libraw.brcm.decode(path)
+    e = analyze(raw.visible_image, cfa.from_filters(raw.idata.filters), raw.black, raw.maximum)
+"""
+
+import collections
+import math
+
+import numpy as np
+
+from libraw import cfa
+
+ChannelStats = collections.namedtuple("ChannelStats", "histogram count mean percentiles saturated black")
+ChannelStats.__doc__ = """histogram: counts of the raw values 0..maximum (values above count as maximum)
+count: number of samples
+mean: mean signal above black
+percentiles: {p: signal above black}
+saturated: fraction of samples at or above maximum
+black: the black level of the channel, including its cblack"""
+
+Exposure = collections.namedtuple("Exposure", "channels saturated ev black maximum stride")
+Exposure.__doc__ = """channels: {color name: ChannelStats}, both greens together as "G"
+saturated: fraction of all samples at or above maximum
+ev: suggested exposure change in stops"""
+
+def channel_stats(samples, black, maximum, percentiles=(1, 50, 99)):
+    """
+    the ChannelStats of an array of raw values.
+    """
+    hist = np.bincount(samples.ravel(), minlength=maximum + 1)
+    if len(hist) > maximum + 1:
+        hist[maximum] += hist[maximum + 1:].sum()
+        hist = hist[:maximum + 1]
+    count = int(hist.sum())
+    if not count:
+        return ChannelStats(hist, 0, 0.0, {p: 0.0 for p in percentiles}, 0.0, black)
+    levels = np.arange(maximum + 1)
+    mean = float(hist @ levels) / count - black
+    cumulative = np.cumsum(hist)
+    pct = {p: float(np.searchsorted(cumulative, count * p / 100.0)) - black for p in percentiles}
+    return ChannelStats(hist, count, mean, pct, float(hist[maximum]) / count, black)
+
+def suggest_ev(channels, maximum, saturated, target=0.9, percentile=99, clip_limit=0.001):
+    """
+    the change in stops that moves the percentile of the brightest channel
+    to target of its range, from the channel's black level to maximum.
+    While more than clip_limit of the samples are saturated the brightness
+    above maximum is unknown, so at least one stop down is suggested.
+    """
+    ev = min(math.log2(target * (maximum - ch.black) / max(ch.percentiles[percentile], 1.0))
+             for ch in channels.values() if ch.count)
+    if saturated > clip_limit:
+        ev = min(ev, -1.0)
+    return ev
+
+def analyze(mosaic, pattern, black, maximum, cblack=None, stride=1, percentiles=(1, 50, 99), four_color=False,
+            **ev_options):
+    """
+    the Exposure of mosaic, whose CFA is pattern (libraw.cfa.Pattern).
+    cblack holds per-color black offsets added to black, as in
+    imgdata.color.cblack[:4]. Channels are the letters of pattern.cdesc, so
+    LibRaw's second green (color 3) counts as "G"; with four_color
+    (idata.colors == 4) it is a channel of its own, "G3". ev_options are
+    passed to suggest_ev, whose percentile is added to percentiles.
+    """
+    maximum = int(maximum)
+    ev_percentile = ev_options.get("percentile", 99)
+    percentiles = tuple(sorted(set(percentiles) | {ev_percentile}))
+    groups = collections.OrderedDict()
+    for color in pattern.colors:
+        name = pattern.cdesc[color]
+        if four_color and name in groups:
+            name += str(color)
+        groups.setdefault(name, []).append(color)
+    channels = collections.OrderedDict()
+    saturated = count = 0
+    for name, colors in groups.items():
+        levels = [black + (int(cblack[c]) if cblack is not None else 0) for c in colors]
+        level = max(levels)
+        views = []
+        for color, own in zip(colors, levels):
+            for v in pattern.channel(mosaic, color):
+                v = v[::stride, ::stride]
+                if own != level:
+                    # greens with different cblack are aligned to the higher level
+                    v = np.minimum(v.astype(np.int32) + (level - own), maximum)
+                views.append(v)
+        samples = views[0] if len(views) == 1 else np.concatenate([v.ravel() for v in views])
+        ch = channel_stats(samples, level, maximum, percentiles)
+        channels[name] = ch
+        saturated += ch.saturated * ch.count
+        count += ch.count
+    saturated = saturated / count if count else 0.0
+    ev = suggest_ev(channels, maximum, saturated, **ev_options)
+    return Exposure(channels, saturated, ev, black, maximum, stride)
+
+def from_imgdata(imgdata, stride=4, **options):
+    """
+    the Exposure of the unpacked file in imgdata, using its visible_image,
+    CFA pattern, black level and maximum.
+    """
+    mosaic = imgdata.rawdata.visible_image
+    if mosaic is None:
+        raise ValueError("not a bayer raw file")
+    color = imgdata.color
+    return analyze(mosaic, cfa.from_imgdata(imgdata), color.black, color.maximum, color.cblack[:4], stride,
+                   four_color=imgdata.idata.colors == 4, **options)
@@ -0,0 +1,60 @@
+"""
+@package libraw.stream
+Develop a mosaic in horizontal strips so that the extra memory needed is
+proportional to the strip, not to the image.
+
+Each strip is read with halo extra rows above and below, enough for the
+neighbourhood the demosaic looks at, and those rows are cropped from the
+result again. As long as halo covers the kernel radius the strips join up
+to exactly the whole-image result.
+
+    develop = Pipeline.from_imgdata(proc.imgdata)
+    for y, rows in libraw.stream.develop_strips(proc.imgdata.rawdata.visible_image, develop):
+        writer.write(rows)
+"""
+
+import numpy as np
+
+def strip_bounds(height, rows, halo=0):
+    """
+    yield (start, stop, in_start, in_stop) mosaic rows for each strip.
+    start/stop cover the image without overlap; in_start/in_stop add the
+    halo, clipped to the image. All but the image height are even so the
+    CFA phase is preserved.
+    """
+    rows = max(rows + rows % 2, 2)
+    halo = halo + halo % 2
+    for start in range(0, height, rows):
+        stop = min(start + rows, height)
+        yield start, stop, max(start - halo, 0), min(stop + halo, height)
+
+def stream(mosaic, func, rows=256, halo=0, shrink=1, channels=3, dtype=np.uint8):
+    """
+    apply func to strips of mosaic and yield (y, output rows).
+
+    func(strip, out) develops a (n, width) mosaic strip into out, an
+    (n // shrink, width // shrink, channels) array. halo is the number of
+    mosaic rows func needs on each side. The yielded rows are a view of a
+    buffer that is reused for the next strip; copy them to keep them.
+    """
+    # rows that do not fill a whole output row are dropped
+    height = mosaic.shape[0] - mosaic.shape[0] % shrink
+    width = mosaic.shape[1] // shrink
+    halo = halo + halo % 2
+    buf = None
+    for start, stop, in_start, in_stop in strip_bounds(height, rows, halo):
+        n = (in_stop - in_start) // shrink
+        if buf is None or buf.shape[0] < n:
+            buf = np.empty((n, width, channels), dtype)
+        out = func(mosaic[in_start:in_stop], buf[:n])
+        first = (start - in_start) // shrink
+        yield start // shrink, out[first:first + (stop - start) // shrink]
+
+def develop_strips(mosaic, pipeline, rows=256):
+    """
+    stream mosaic through a libraw.pipeline.Pipeline (or any callable with
+    the same interface and halo/shrink attributes).
+    """
+    return stream(mosaic, lambda strip, out: pipeline(strip, out=out), rows,
+                  halo=getattr(pipeline, "halo", 0), shrink=getattr(pipeline, "shrink", 1),
+                  dtype=getattr(pipeline, "dtype", np.uint8))
@@ -0,0 +1,93 @@
+"""
+@package libraw.tiers
+Named quality tiers for rendering, from cheapest to best:
+
+    draft8   1/8 size, raw mosaic binned in NumPy, no demosaic
+    draft    1/4 size, raw mosaic binned in NumPy, no demosaic
+    preview  1/2 size, LibRaw half_size with linear interpolation
+    final    full size, LibRaw AHD interpolation
+
+    proc.open_file(path)
+    rgb = render(proc, pick(proc.imgdata.sizes, 800))
+
+The draft tiers average each n x n block of CFA cells into one cell, which
+keeps the bayer pattern, and develop the smaller mosaic with
+libraw.pipeline (half-size demosaic and the example.py color steps).
+"""
+
+import collections
+
+import numpy as np
+
+from libraw.pipeline import Pipeline
+
+Tier = collections.namedtuple("Tier", "name scale params binning")
+
+_HALF = {"half_size": 1, "user_qual": 0, "four_color_rgb": 0, "no_auto_scale": 0, "no_interpolation": 0}
+
+TIERS = collections.OrderedDict((t.name, t) for t in [
+    Tier("draft8", 8, _HALF, 4),
+    Tier("draft", 4, _HALF, 2),
+    Tier("preview", 2, _HALF, 0),
+    Tier("final", 1, {"half_size": 0, "user_qual": 3, "four_color_rgb": 0, "no_auto_scale": 0, "no_interpolation": 0}, 0),
+])
+
+def apply(proc, name):
+    """
+    set the LibRaw output parameters of tier name on proc.
+    """
+    params = proc.imgdata.params
+    for field, value in TIERS[name].params.items():
+        setattr(params, field, value)
+
+def pick(sizes, target):
+    """
+    the cheapest tier whose output's longer side is at least target pixels,
+    for an image of sizes (imgdata.sizes).
+    """
+    longest = max(sizes.width, sizes.height)
+    for tier in TIERS.values():
+        if longest // tier.scale >= target:
+            return tier.name
+    return "final"
+
+def bin_mosaic(mosaic, n, out=None):
+    """
+    average n x n blocks of 2x2 CFA cells into a mosaic n times smaller
+    with the same CFA pattern. Rows and columns that do not fill a block
+    are dropped.
+    """
+    h, w = mosaic.shape[0] // (2 * n), mosaic.shape[1] // (2 * n)
+    # add up rows, then columns, as whole-array adds (much faster than .sum over the 6d view)
+    rows = mosaic[:h * 2 * n, :w * 2 * n].reshape(h, n, 2, w * 2 * n)
+    acc = rows[:, 0].astype(np.uint32)
+    for k in range(1, n):
+        acc += rows[:, k]
+    cols = acc.reshape(h, 2, w, n, 2)
+    sums = cols[:, :, :, 0].copy()
+    for k in range(1, n):
+        sums += cols[:, :, :, k]
+    if out is None:
+        out = np.empty((2 * h, 2 * w), mosaic.dtype)
+    np.floor_divide(sums, n * n, out=out.reshape(h, 2, w, 2), casting="unsafe")
+    return out
+
+def render(proc, name, pipeline=None):
+    """
+    render the opened file in proc at tier name and return an RGB array.
+    Draft tiers return uint8; the others whatever output_bps is set to.
+    A Pipeline built for this camera setup can be passed to skip building one.
+    """
+    tier = TIERS[name]
+    apply(proc, name)
+    proc.unpack()
+    if tier.binning:
+        if pipeline is None:
+            pipeline = Pipeline.from_imgdata(proc.imgdata)
+        mosaic = proc.imgdata.rawdata.visible_image
+        if mosaic is None:
+            raise ValueError("the {} tier needs bayer raw data".format(name))
+        small = bin_mosaic(mosaic, tier.binning)
+        return pipeline(small, inplace=True)
+    proc.dcraw_process()
+    return proc.dcraw_make_mem_image()
@@ -0,0 +1,290 @@
+"""
+@package libraw.writers
+Write images held in NumPy arrays as PPM/PGM, baseline TIFF or .npy.
+
+Arrays are (height, width) or (height, width, colors) of uint8 or uint16.
+Pixel data goes to the file in large sequential writes straight from the
+array's buffer; only rows that need a byte order change are converted, a
+few MiB at a time.
+
+Images that are produced in strips (see libraw.stream) are written as they
+come with an ImageWriter, without assembling the whole image:
+
+    with ImageWriter("out.tiff", (height, width, 3), np.uint8) as w:
+        for y, rows in develop_strips(mosaic, pipeline):
+            w.write(rows)
+
+memmap() creates the file up front and returns its pixel data as a
+writable array, so an image can be developed directly into the file, and
+BackgroundWriter writes on a separate thread so that encoding and disk I/O
+overlap decoding the next frame.
+"""
+
+import concurrent.futures
+import io
+import os
+import struct
+import threading
+
+import numpy as np
+
+# bytes converted per write when the byte order has to change
+CHUNK = 4 << 20
+
+def _check(img):
+    img = np.asarray(img)
+    if img.ndim == 2:
+        img = img[:, :, np.newaxis]
+    if img.ndim != 3 or img.dtype not in (np.uint8, np.uint16):
+        raise ValueError("expected a (height, width[, colors]) uint8 or uint16 array")
+    return img
+
+def _shape3(shape):
+    return tuple(shape) + (1,) if len(shape) == 2 else tuple(shape)
+
+def _ppm_header(shape, dtype):
+    h, w, c = _shape3(shape)
+    if c not in (1, 3):
+        raise ValueError("PPM needs 1 or 3 colors, got {}".format(c))
+    maxval = 255 if dtype == np.uint8 else 65535
+    header = "{}\n{} {}\n{}\n".format("P6" if c == 3 else "P5", w, h, maxval).encode("ascii")
+    return header, np.dtype(np.uint8 if maxval == 255 else ">u2")
+
+# TIFF tag types
+_SHORT = 3
+_LONG = 4
+_RATIONAL = 5
+
+def _tiff_header(h, w, c, bits):
+    """
+    header and IFD of an uncompressed little-endian single strip TIFF.
+    The pixel data follows immediately after the returned bytes.
+    """
+    ntags = 13
+    ifd_offset = 8
+    extra_offset = ifd_offset + 2 + ntags * 12 + 4
+    # out-of-line values: BitsPerSample (if more than 2), XResolution, YResolution
+    bps_offset = extra_offset
+    res_offset = bps_offset + (2 * c if c > 2 else 0)
+    data_offset = res_offset + 16
+    bps = [bits] * c
+
+    tags = [
+        (256, _LONG, 1, w),                     # ImageWidth
+        (257, _LONG, 1, h),                     # ImageLength
+        (258, _SHORT, c, bps_offset if c > 2 else bps),  # BitsPerSample
+        (259, _SHORT, 1, 1),                    # Compression: none
+        (262, _SHORT, 1, 2 if c >= 3 else 1),   # PhotometricInterpretation: RGB / BlackIsZero
+        (273, _LONG, 1, data_offset),           # StripOffsets
+        (277, _SHORT, 1, c),                    # SamplesPerPixel
+        (278, _LONG, 1, h),                     # RowsPerStrip
+        (279, _LONG, 1, h * w * c * bits // 8), # StripByteCounts
+        (282, _RATIONAL, 1, res_offset),        # XResolution
+        (283, _RATIONAL, 1, res_offset + 8),    # YResolution
+        (284, _SHORT, 1, 1),                    # PlanarConfiguration: chunky
+        (296, _SHORT, 1, 2),                    # ResolutionUnit: inch
+    ]
+    assert len(tags) == ntags
+
+    out = [b"II*\0", struct.pack("<I", ifd_offset), struct.pack("<H", ntags)]
+    for tag, typ, count, value in tags:
+        if isinstance(value, list):  # short inline array
+            value = struct.pack("<2H", *(value + [0] * (2 - len(value))))
+        elif typ == _SHORT and count == 1:
+            value = struct.pack("<HH", value, 0)
+        else:
+            value = struct.pack("<I", value)
+        out.append(struct.pack("<HHI", tag, typ, count) + value)
+    out.append(struct.pack("<I", 0))  # no next IFD
+    if c > 2:
+        out.append(struct.pack("<{}H".format(c), *bps))
+    out.append(struct.pack("<4I", 72, 1, 72, 1))
+    header = b"".join(out)
+    assert len(header) == data_offset
+    return header
+
+def _tiff(shape, dtype):
+    h, w, c = _shape3(shape)
+    itemsize = np.dtype(dtype).itemsize
+    return _tiff_header(h, w, c, itemsize * 8), np.dtype("<u{}".format(itemsize))
+
+def _npy(shape, dtype):
+    f = io.BytesIO()
+    np.lib.format.write_array_header_1_0(f, {"descr": np.dtype(dtype).str, "fortran_order": False,
+                                             "shape": tuple(shape)})
+    return f.getvalue(), np.dtype(dtype)
+
+# extension -> function returning (header, dtype of the samples in the file)
+FORMATS = {
+    ".ppm": _ppm_header,
+    ".pgm": _ppm_header,
+    ".tif": _tiff,
+    ".tiff": _tiff,
+    ".npy": _npy,
+}
+
+def _format(path):
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        return FORMATS[ext]
+    except KeyError:
+        raise ValueError("no writer for {}".format(ext))
+
+def _write_rows(f, rows, dtype):
+    """
+    write rows with samples of dtype, directly from the array when it is
+    contiguous and already in that byte order.
+    """
+    if rows.dtype == dtype and rows.flags.c_contiguous:
+        f.write(memoryview(rows).cast("B"))
+        return
+    step = max(CHUNK // max(rows[:1].nbytes, 1), 1)
+    buf = None
+    for start in range(0, len(rows), step):
+        part = rows[start:start + step]
+        if buf is None or len(buf) != len(part):
+            buf = np.empty(part.shape, dtype)
+        np.copyto(buf, part, casting="unsafe")
+        f.write(memoryview(buf).cast("B"))
+
+def _write(path, img, header):
+    head, dtype = header(img.shape, img.dtype)
+    with open(path, "wb") as f:
+        f.write(head)
+        _write_rows(f, img, dtype)
+
+def write_ppm(path, img):
+    """
+    write a binary PPM (3 colors) or PGM (1 color); 16 bit samples are big-endian.
+    """
+    _write(path, _check(img), _ppm_header)
+
+def write_tiff(path, img):
+    """
+    write a baseline, uncompressed 8 or 16 bit TIFF.
+    """
+    _write(path, _check(img), _tiff)
+
+def write_npy(path, img):
+    """
+    write an .npy file that np.load can memory-map.
+    """
+    img = np.asarray(img)
+    _write(path, img, _npy)
+
+WRITERS = {
+    ".ppm": write_ppm,
+    ".pgm": write_ppm,
+    ".tif": write_tiff,
+    ".tiff": write_tiff,
+    ".npy": write_npy,
+}
+
+def write(path, img):
+    """
+    write img with the writer matching the extension of path.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        writer = WRITERS[ext]
+    except KeyError:
+        raise ValueError("no writer for {}".format(ext))
+    writer(path, img)
+
+class ImageWriter:
+    """
+    writes an image of shape (height, width[, colors]) and dtype to path
+    strip by strip; the format follows the extension. write() takes the
+    next rows, and close() checks that all height rows were written.
+    """
+    def __init__(self, path, shape, dtype):
+        dtype = np.dtype(dtype)
+        if dtype not in (np.uint8, np.uint16) or len(shape) not in (2, 3):
+            raise ValueError("expected a (height, width[, colors]) uint8 or uint16 image")
+        head, self._dtype = _format(path)(shape, dtype)
+        self.path = path
+        self.shape = tuple(shape)
+        self.rows = 0
+        self._file = open(path, "wb")
+        self._file.write(head)
+
+    def write(self, rows):
+        rows = np.asarray(rows)
+        if rows.shape[1:] != self.shape[1:]:
+            raise ValueError("rows of shape {} do not fit an image of shape {}".format(rows.shape, self.shape))
+        if self.rows + len(rows) > self.shape[0]:
+            raise ValueError("more than {} rows written".format(self.shape[0]))
+        _write_rows(self._file, rows, self._dtype)
+        self.rows += len(rows)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        if self.rows != self.shape[0]:
+            raise ValueError("{} of {} rows written to {}".format(self.rows, self.shape[0], self.path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self._file.close()
+
+def write_strips(path, strips, shape, dtype=np.uint8):
+    """
+    write the rows produced by strips, arrays or (y, rows) pairs as yielded
+    by libraw.stream, as one image of shape.
+    """
+    with ImageWriter(path, shape, dtype) as w:
+        for strip in strips:
+            w.write(strip[1] if isinstance(strip, tuple) else strip)
+
+def memmap(path, shape, dtype=np.uint8):
+    """
+    create an image file of shape and return its pixel data as a writable
+    np.memmap. Whatever is stored into the array ends up in the file; other
+    processes can open the result without copying, .npy with
+    np.load(mmap_mode="r"). 16 bit PPMs are big-endian, so the array is too.
+    """
+    dtype = np.dtype(dtype)
+    head, file_dtype = _format(path)(shape, dtype)
+    with open(path, "wb") as f:
+        f.write(head)
+        f.truncate(len(head) + int(np.prod(shape)) * dtype.itemsize)
+    return np.memmap(path, file_dtype, "r+", offset=len(head), shape=tuple(shape))
+
+class BackgroundWriter:
+    """
+    writes images on a separate thread. submit() returns a Future and
+    blocks while max_pending images are waiting, so a slow disk throttles
+    the producer instead of queueing images in memory. The submitted array
+    must not be changed until its Future is done.
+    """
+    def __init__(self, max_pending=2):
+        self._executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="libraw-writer")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, path, img, writer=write):
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(writer, path, img)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        return future
+
+    def close(self, wait=True):
+        """
+        finish (or with wait=False, abandon) the queued writes.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
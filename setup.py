@@ -11,6 +11,7 @@ setup(
         'Programming Language :: Python :: 3',
     ],
     platform="Raspberry Pi",
-    py_modules=["libraw"],
+    packages=["libraw"],
+    entry_points={"console_scripts": ["libraw = libraw.__main__:main"]},
     data_files=[('lib/', ['libraw.so.20.0.0'])]
 )